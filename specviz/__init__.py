@@ -32,8 +32,10 @@ logging.basicConfig(format='specviz [%(levelname)-8s]: %(message)s',
                     level=logging.INFO)
 
 def load_settings():
+    from .utils import SETTINGS_PATH
+
     # Get the path relative to the user's home directory
-    path = os.path.expanduser("~/.specviz")
+    path = SETTINGS_PATH
 
     # If the directory doesn't exist, create it
     if not os.path.exists(path):
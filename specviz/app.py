@@ -40,10 +40,10 @@ class Application(QApplication):
             # Load local plugins
             self.load_local_plugins()
 
-        # If a file path has been given, automatically add data
-        if file_path is not None:
-            self.current_workspace.load_data(
-                file_path, file_loader, display=True)
+        # If file paths have been given, automatically add data. These may be
+        # individual files, glob patterns, or directories.
+        if file_path:
+            self.current_workspace.load_data_async(file_path, file_loader)
 
     def add_workspace(self):
         """
@@ -96,18 +96,19 @@ class Application(QApplication):
 
 
 @click.command()
-@click.option('--file_path', '-F', type=click.Path(exists=True), help="Load the file at the given path on startup.")
-@click.option('--loader', '-L', type=str, help="Use specified loader when opening the provided file.")
+@click.argument('file_paths', nargs=-1, type=click.Path())
+@click.option('--file_path', '-F', type=click.Path(), multiple=True, help="Load the file, glob pattern, or directory at the given path on startup. May be given multiple times.")
+@click.option('--loader', '-L', type=str, help="Use specified loader when opening the provided files. Defaults to 'auto', which detects the format of each file.")
 @click.option('--embed', '-E', is_flag=True, help="Only display a single plot window. Useful when embedding in other applications.")
 @click.option('--version', '-V', is_flag=True, help="Print version information", is_eager=True)
-def start(version=False, file_path=None, loader=None, embed=None):
+def start(file_paths=(), version=False, file_path=(), loader=None, embed=None):
     if version:
         print(__version__)
         return
 
     # Start the application, passing in arguments
-    app = Application(sys.argv, file_path=file_path, file_loader=loader,
-                      embeded=embed)
+    app = Application(sys.argv, file_path=list(file_path) + list(file_paths),
+                      file_loader=loader, embeded=embed)
 
     # Enable hidpi icons
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
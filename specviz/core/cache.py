@@ -0,0 +1,506 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+import astropy.units as u
+import numpy as np
+from astropy.nddata import (InverseVariance, StdDevUncertainty,
+                            VarianceUncertainty)
+from specutils import Spectrum1D
+
+from ..utils import SETTINGS_PATH
+
+# Uncertainty classes that can be stored in the cache, keyed by the name
+# written to the entry metadata
+UNCERTAINTY_TYPES = {cls.__name__: cls for cls in (
+    StdDevUncertainty, VarianceUncertainty, InverseVariance)}
+
+# Default upper bound on the total size of the cache on disk, in bytes
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3
+
+# Number of entries stored between full scans of the cache, which also pick
+# up entries stored by other processes
+FULL_SCAN_INTERVAL = 64
+
+# Age, in seconds, after which partially written entries are assumed to have
+# been abandoned by a crashed process
+STALE_ENTRY_AGE = 60 * 60
+
+
+class SpectrumCache:
+    """
+    On-disk cache of parsed spectra. Each entry is a directory holding the
+    flux, spectral axis, uncertainty, and mask arrays as ``.npy`` files,
+    which can be memory-mapped instead of read, along with a small JSON file
+    of unit information and the pickled meta data of the spectrum, e.g. the
+    header of the file it was read from. The spectral WCS is rebuilt from the
+    spectral axis. Entries are keyed by the path, size, and modification time
+    of the source file along with the loader used to parse it, so editing or
+    replacing a file invalidates its entry.
+
+    The total size of the cache is bounded. When it is exceeded, the least
+    recently used entries are evicted. The modification time of each entry
+    directory records when it was last used, so that the cache can be safely
+    shared between processes without a separate index. Rather than scanning
+    every entry on each store, a running estimate of the size is kept and
+    the cache is only scanned once the estimate exceeds the bound, or every
+    `FULL_SCAN_INTERVAL` stores.
+
+    Parameters
+    ----------
+    path : str, optional
+        Directory in which entries are stored.
+    max_size : int, optional
+        Upper bound on the total size of the cache, in bytes.
+    """
+    def __init__(self, path=None, max_size=DEFAULT_MAX_SIZE):
+        self._path = path or os.path.join(SETTINGS_PATH, "cache", "spectra")
+        self._max_size = max_size
+
+        # Estimated total size of the cache, and the number of entries stored
+        # since it was last measured
+        self._size_estimate = None
+        self._puts_since_scan = 0
+        self._size_lock = threading.Lock()
+
+    @property
+    def path(self):
+        """Directory in which entries are stored."""
+        return self._path
+
+    @property
+    def max_size(self):
+        """Upper bound on the total size of the cache, in bytes."""
+        return self._max_size
+
+    @staticmethod
+    def key(file_path, file_loader):
+        """
+        Compute the cache key for a file as it currently exists on disk.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to location of the spectrum file.
+        file_loader : str
+            Format specified for the astropy io interface.
+
+        Returns
+        -------
+        str
+            Hex digest identifying the cache entry.
+        """
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+
+        return hashlib.sha1("{}|{}|{}|{}".format(
+            file_path, stat.st_size, stat.st_mtime_ns,
+            file_loader).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self._path, key)
+
+    def get(self, file_path, file_loader):
+        """
+        Retrieve the cached spectrum for a file.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to location of the spectrum file.
+        file_loader : str
+            Format specified for the astropy io interface.
+
+        Returns
+        -------
+        : :class:`~specutils.Spectrum1D` or None
+            The cached spectrum, backed by memory-mapped arrays, or `None` if
+            the file is not in the cache.
+        """
+        entry_path = self._entry_path(self.key(file_path, file_loader))
+
+        try:
+            spec = self._read_entry(entry_path)
+        except (OSError, ValueError, KeyError, EOFError, AttributeError,
+                ImportError, pickle.UnpicklingError) as e:
+            if os.path.exists(entry_path):
+                logging.warning("Discarding unreadable cache entry '%s': %s",
+                                entry_path, e)
+                shutil.rmtree(entry_path, ignore_errors=True)
+
+            return
+
+        # Mark the entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+
+        return spec
+
+    def contains(self, file_path, file_loader):
+        """
+        Whether the cache holds an entry for the file as it currently exists
+        on disk.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to location of the spectrum file.
+        file_loader : str
+            Format specified for the astropy io interface.
+        """
+        return os.path.isdir(
+            self._entry_path(self.key(file_path, file_loader)))
+
+    def get_meta(self, file_path, file_loader):
+        """
+        Retrieve the unit information of a cached spectrum without loading
+        any of its arrays.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to location of the spectrum file.
+        file_loader : str
+            Format specified for the astropy io interface.
+
+        Returns
+        -------
+        dict or None
+            The unit information of the entry, or `None` if the file is not in
+            the cache.
+        """
+        entry_path = self._entry_path(self.key(file_path, file_loader))
+
+        try:
+            with open(os.path.join(entry_path, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return
+
+    def put(self, file_path, file_loader, spec):
+        """
+        Store a parsed spectrum in the cache and evict old entries if the
+        cache has grown too large. Spectra with uncertainty types or meta
+        data that cannot be stored are skipped.
+
+        Parameters
+        ----------
+        file_path : str
+            Path to location of the spectrum file.
+        file_loader : str
+            Format specified for the astropy io interface.
+        spec : :class:`~specutils.Spectrum1D`
+            The parsed spectrum.
+        """
+        uncertainty = spec.uncertainty
+
+        if uncertainty is not None and \
+                type(uncertainty).__name__ not in UNCERTAINTY_TYPES:
+            return
+
+        entry_path = self._entry_path(self.key(file_path, file_loader))
+
+        if os.path.exists(entry_path):
+            return
+
+        try:
+            spec_meta = pickle.dumps(spec.meta)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            logging.debug("Not caching spectrum for '%s', its meta data "
+                          "cannot be stored: %s", file_path, e)
+            return
+
+        meta = {'flux_unit': spec.flux.unit.to_string(),
+                'spectral_axis_unit': spec.spectral_axis.unit.to_string()}
+
+        try:
+            os.makedirs(self._path, exist_ok=True)
+
+            # Write the entry under a temporary name and move it into place
+            # once complete, so readers never see a partial entry
+            tmp_path = tempfile.mkdtemp(dir=self._path, suffix=".tmp")
+
+            np.save(os.path.join(tmp_path, "flux.npy"),
+                    np.asarray(spec.flux.value))
+            np.save(os.path.join(tmp_path, "spectral_axis.npy"),
+                    np.asarray(spec.spectral_axis.value))
+
+            if uncertainty is not None:
+                np.save(os.path.join(tmp_path, "uncertainty.npy"),
+                        np.asarray(uncertainty.array))
+
+                meta['uncertainty_type'] = type(uncertainty).__name__
+                meta['uncertainty_unit'] = (
+                    None if uncertainty.unit is None
+                    else u.Unit(uncertainty.unit).to_string())
+
+            if spec.mask is not None:
+                np.save(os.path.join(tmp_path, "mask.npy"),
+                        np.asarray(spec.mask))
+
+                meta['mask'] = True
+
+            with open(os.path.join(tmp_path, "spec_meta.pkl"), 'wb') as f:
+                f.write(spec_meta)
+
+            with open(os.path.join(tmp_path, "meta.json"), 'w') as f:
+                json.dump(meta, f)
+
+            entry_size = sum(x.stat().st_size for x in os.scandir(tmp_path))
+
+            try:
+                os.rename(tmp_path, entry_path)
+            except OSError:
+                # Another process stored the same entry in the meantime
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                return
+        except OSError as e:
+            logging.warning("Unable to cache spectrum for '%s': %s",
+                            file_path, e)
+            return
+
+        with self._size_lock:
+            if self._size_estimate is not None:
+                self._size_estimate += entry_size
+                self._puts_since_scan += 1
+
+            scan = self._size_estimate is None or \
+                self._size_estimate > self._max_size or \
+                self._puts_since_scan >= FULL_SCAN_INTERVAL
+
+        if scan:
+            self.evict()
+
+    @staticmethod
+    def _read_entry(entry_path):
+        with open(os.path.join(entry_path, "meta.json")) as f:
+            meta = json.load(f)
+
+        flux = np.load(os.path.join(entry_path, "flux.npy"), mmap_mode='r')
+        spectral_axis = np.load(os.path.join(entry_path, "spectral_axis.npy"),
+                                mmap_mode='r')
+        uncertainty = None
+
+        if 'uncertainty_type' in meta:
+            unc_array = np.load(os.path.join(entry_path, "uncertainty.npy"),
+                                mmap_mode='r')
+            uncertainty = UNCERTAINTY_TYPES[meta['uncertainty_type']](
+                unc_array, unit=meta['uncertainty_unit'], copy=False)
+
+        mask = None
+
+        if meta.get('mask'):
+            mask = np.load(os.path.join(entry_path, "mask.npy"),
+                           mmap_mode='r')
+
+        # Entries written before the meta data was stored lack this file, and
+        # are discarded and parsed again
+        with open(os.path.join(entry_path, "spec_meta.pkl"), 'rb') as f:
+            spec_meta = pickle.load(f)
+
+        return Spectrum1D(
+            flux=u.Quantity(flux, meta['flux_unit'], copy=False),
+            spectral_axis=u.Quantity(spectral_axis,
+                                     meta['spectral_axis_unit'], copy=False),
+            uncertainty=uncertainty, mask=mask, meta=spec_meta)
+
+    def _entries(self):
+        """List each entry as a tuple of (last used time, size, path)."""
+        entries = []
+
+        try:
+            dir_entries = list(os.scandir(self._path))
+        except OSError:
+            return entries
+
+        for dir_entry in dir_entries:
+            if not dir_entry.is_dir():
+                continue
+
+            if dir_entry.name.endswith(".tmp"):
+                try:
+                    if time.time() - dir_entry.stat().st_mtime > \
+                            STALE_ENTRY_AGE:
+                        shutil.rmtree(dir_entry.path, ignore_errors=True)
+                except OSError:
+                    pass
+
+                continue
+
+            try:
+                size = sum(x.stat().st_size
+                           for x in os.scandir(dir_entry.path))
+                entries.append((dir_entry.stat().st_mtime, size,
+                                dir_entry.path))
+            except OSError:
+                continue
+
+        return entries
+
+    @property
+    def size(self):
+        """The total size of all entries in the cache, in bytes."""
+        return sum(x[1] for x in self._entries())
+
+    def evict(self, max_size=None):
+        """
+        Remove the least recently used entries until the total size of the
+        cache is within bounds.
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Size to shrink the cache to, in bytes. Defaults to the maximum
+            size of the cache.
+        """
+        max_size = self._max_size if max_size is None else max_size
+        entries = sorted(self._entries())
+        total_size = sum(x[1] for x in entries)
+
+        for _, size, entry_path in entries:
+            if total_size <= max_size:
+                break
+
+            shutil.rmtree(entry_path, ignore_errors=True)
+            total_size -= size
+
+        with self._size_lock:
+            self._size_estimate = total_size
+            self._puts_since_scan = 0
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        self.evict(max_size=0)
+
+
+_spectrum_cache = None
+
+
+def spectrum_cache():
+    """The spectrum cache shared by all loads in this process."""
+    global _spectrum_cache
+
+    if _spectrum_cache is None:
+        _spectrum_cache = SpectrumCache()
+
+    return _spectrum_cache
+
+
+class ConvertedArrayStore:
+    """
+    In-memory store of unit-converted arrays, and data derived from them,
+    shared by the plot data items of every plot window. Plot windows each
+    create their own plot data item for a data item, so without sharing,
+    each window showing a spectrum in the same units holds its own copy of
+    the converted arrays.
+
+    Entries are reference counted. Each holder acquires an entry, computing
+    it if no other holder has, and releases it once it is no longer needed.
+    The entry is dropped when its last holder releases it. Arrays handed out
+    by the store are made read-only, since they are shared.
+
+    Keys begin with the identifier of the data item the entry was derived
+    from, followed by anything else distinguishing it, e.g. the version of
+    the data and the units.
+    """
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def acquire(self, key, compute):
+        """
+        Retrieve an entry, computing it with ``compute`` if it is not
+        present, and add a reference to it.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of the entry, starting with the identifier of the data item.
+        compute : callable
+            Computes the entry if it is not present.
+
+        Returns
+        -------
+        object
+            The entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                entry[1] += 1
+                return entry[0]
+
+        # Computed outside of the lock, so that other entries can be computed
+        # concurrently. If another holder computes the same entry meanwhile,
+        # theirs is kept.
+        value = compute()
+
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+
+        with self._lock:
+            entry = self._entries.setdefault(key, [value, 0])
+            entry[1] += 1
+
+            return entry[0]
+
+    def release(self, key):
+        """
+        Remove a reference to an entry, dropping it if it was the last.
+
+        Parameters
+        ----------
+        key : tuple
+            Key of the entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return
+
+            entry[1] -= 1
+
+            if entry[1] <= 0:
+                del self._entries[key]
+
+    def refcount(self, key):
+        """The number of references to an entry."""
+        entry = self._entries.get(key)
+
+        return 0 if entry is None else entry[1]
+
+    def discard(self, identifier):
+        """
+        Drop every entry derived from a data item, regardless of references,
+        e.g. once the data item has been removed.
+
+        Parameters
+        ----------
+        identifier : :class:`~uuid.UUID`
+            Identifier of the data item.
+        """
+        with self._lock:
+            for key in [x for x in self._entries if x[0] == identifier]:
+                del self._entries[key]
+
+    @property
+    def nbytes(self):
+        """The total size of the arrays in the store, in bytes."""
+        return sum(value.nbytes for value, _ in self._entries.values()
+                   if isinstance(value, np.ndarray))
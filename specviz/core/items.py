@@ -1,15 +1,64 @@
+from collections import OrderedDict
 from itertools import cycle
 
+import astropy.units as u
+import numpy as np
 import pyqtgraph as pg
 from astropy.units import spectral, spectral_density
 from qtpy.QtCore import Property, Qt, Signal
 from qtpy.QtGui import QStandardItem
 
+from ..utils.decimation import EnvelopePyramid
+from ..utils.unit_conversion import convert_flux, convert_spectral_axis
+from .loaders import SpectrumHandle
+
 flatui = cycle(["#000000", "#9b59b6", "#3498db", "#95a5a6", "#e74c3c",
                 "#34495e", "#2ecc71"])
 
 
+def is_data_unit_compatible(data_unit, spectral_axis_unit, unit):
+    """
+    Whether flux in ``data_unit``, measured along a spectral axis in
+    ``spectral_axis_unit``, can be displayed in ``unit``. Only the units are
+    considered, so this can be evaluated once for many spectra that share
+    the same units.
+    """
+    return (data_unit == "" or
+            unit is not None and
+            data_unit.is_equivalent(
+                unit, equivalencies=spectral_density(
+                    u.Quantity(1, spectral_axis_unit))))
+
+
+def is_spectral_axis_unit_compatible(spectral_axis_unit, unit):
+    """
+    Whether a spectral axis in ``spectral_axis_unit`` can be displayed in
+    ``unit``.
+    """
+    return (spectral_axis_unit == "" or
+            unit is not None and
+            spectral_axis_unit.is_equivalent(unit, equivalencies=spectral()))
+
+
+def are_units_compatible(data_unit, spectral_axis_unit,
+                         target_spectral_axis_unit, target_data_unit):
+    """
+    Whether a spectrum with the given flux and spectral axis units can be
+    displayed in the target units.
+    """
+    return is_data_unit_compatible(data_unit, spectral_axis_unit,
+                                   target_data_unit) and \
+        is_spectral_axis_unit_compatible(spectral_axis_unit,
+                                         target_spectral_axis_unit)
+
+
 class DataItem(QStandardItem):
+    """
+    Model item holding a single spectrum. The data may either be a
+    :class:`~specutils.Spectrum1D`, or a lightweight
+    :class:`~specviz.core.loaders.SpectrumHandle` which is only materialized
+    into a spectrum the first time its flux or spectral axis are accessed.
+    """
     NameRole = Qt.UserRole + 1
     IdRole = Qt.UserRole + 2
     DataRole = Qt.UserRole + 3
@@ -18,6 +67,13 @@ class DataItem(QStandardItem):
                  spectral_axis_unit=None, *args, **kwargs):
         super(DataItem, self).__init__(*args, **kwargs)
 
+        # Materialized spectrum when the data role holds a handle
+        self._spectrum = None
+
+        # Incremented whenever the data is replaced, so that values derived
+        # from it can tell when they are stale
+        self._version = 0
+
         self.setData(name, self.NameRole)
         self.setData(identifier, self.IdRole)
         self.setData(data, self.DataRole)
@@ -28,6 +84,11 @@ class DataItem(QStandardItem):
     def identifier(self):
         return self.data(self.IdRole)
 
+    @property
+    def version(self):
+        """Counter incremented each time the data is replaced."""
+        return self._version
+
     @Property(str)
     def name(self):
         return self.data(self.NameRole)
@@ -38,36 +99,139 @@ class DataItem(QStandardItem):
 
     @Property(list)
     def flux(self):
-        return self.data(self.DataRole).flux
+        return self.spectrum.flux
 
     @Property(list)
     def spectral_axis(self):
-        return self.data(self.DataRole).spectral_axis
+        return self.spectrum.spectral_axis
+
+    @property
+    def flux_unit(self):
+        """
+        The unit of the flux. This does not materialize lazily held data.
+        """
+        data = self.data(self.DataRole)
+
+        if isinstance(data, SpectrumHandle) and self._spectrum is None:
+            return data.flux_unit
+
+        return self.flux.unit
+
+    @property
+    def spectral_axis_unit(self):
+        """
+        The unit of the spectral axis. This does not materialize lazily held
+        data.
+        """
+        data = self.data(self.DataRole)
+
+        if isinstance(data, SpectrumHandle) and self._spectrum is None:
+            return data.spectral_axis_unit
+
+        return self.spectral_axis.unit
+
+    @property
+    def units_known(self):
+        """
+        Whether the units can be read without parsing the spectrum file of
+        lazily held data.
+        """
+        data = self.data(self.DataRole)
+
+        return not isinstance(data, SpectrumHandle) or \
+            self._spectrum is not None or data.units_known
 
     def set_data(self, data):
         """
         Updates the stored :class:`~specutils.Spectrum1D` data values.
         """
+        self._spectrum = None
+        self._version += 1
         self.setData(data, self.DataRole)
 
+    @property
+    def is_materialized(self):
+        """Whether the spectrum is currently held in memory."""
+        return not isinstance(self.data(self.DataRole), SpectrumHandle) or \
+            self._spectrum is not None
+
+    def release(self):
+        """
+        Drop the materialized spectrum of lazily held data. It will be loaded
+        again the next time it is accessed. Has no effect on data that was
+        not given as a handle.
+        """
+        self._spectrum = None
+
     @property
     def spectrum(self):
-        return self.data(self.DataRole)
+        data = self.data(self.DataRole)
+
+        if isinstance(data, SpectrumHandle):
+            if self._spectrum is None:
+                self._spectrum = data.load()
+
+                # Units of rows not yet loaded may have been unknown to
+                # listeners, e.g. plot compatibility checks
+                model = self.model()
+
+                if model is not None and hasattr(model, 'data_loaded'):
+                    model.data_loaded.emit(self)
+
+            return self._spectrum
+
+        return data
 
 
 class PlotDataItem(pg.PlotDataItem):
+    # Number of unit-converted arrays, and data derived from them, retained
+    # per item, enough to switch back and forth between a couple of unit
+    # choices without converting
+    CONVERSION_CACHE_SIZE = 12
+
+    # Spectra with more points than this are decimated and clipped to the
+    # view for display
+    DECIMATION_THRESHOLD = 10000
+
+    # Width, as a fraction of the view, of the extra data drawn either side
+    # of the view so that small pans do not need a redraw
+    VIEW_MARGIN = 0.5
+
+    # Floating point types in which the displayed arrays are stored, by name
+    # of the display precision. The data item always keeps the full
+    # precision spectrum for analysis.
+    DISPLAY_DTYPES = {'double': np.float64, 'single': np.float32}
+
     data_unit_changed = Signal(str)
     spectral_axis_unit_changed = Signal(str)
     color_changed = Signal(str)
     width_changed = Signal(int)
     visibility_changed = Signal(bool)
 
-    def __init__(self, data_item, color=None, *args, **kwargs):
+    def __init__(self, data_item, color=None, store=None,
+                 display_precision='double', *args, **kwargs):
         super(PlotDataItem, self).__init__(*args, **kwargs)
 
         self._data_item = data_item
-        self._data_unit = self._data_item.flux.unit.to_string()
-        self._spectral_axis_unit = self._data_item.spectral_axis.unit.to_string()
+        self._data_unit = self._data_item.flux_unit.to_string()
+        self._spectral_axis_unit = self._data_item.spectral_axis_unit.to_string()
+        self._conversion_cache = OrderedDict()
+
+        # Version of the data item the cached conversions were derived from
+        self._conversion_version = self._data_item.version
+
+        # Store through which converted arrays are shared with the plot data
+        # items of the same data item in other plot windows
+        self._store = store
+        self._display_precision = self._check_precision(display_precision)
+        self._redraw_suspended = False
+
+        # Range and pixel width of the view displaying this item, used to
+        # choose what is drawn, and the level of detail and span of the
+        # sorted spectral axis currently drawn
+        self._view = None
+        self._drawn = None
+
         self._color = color or next(flatui)
         self._width = 1
         self._visible = False
@@ -110,20 +274,18 @@ class PlotDataItem(pg.PlotDataItem):
         self.data_unit_changed.emit(self._data_unit)
 
     def are_units_compatible(self, spectral_axis_unit, data_unit):
-        return self.is_data_unit_compatible(data_unit) and \
-            self.is_spectral_axis_unit_compatible(spectral_axis_unit)
+        return are_units_compatible(self.data_item.flux_unit,
+                                    self.data_item.spectral_axis_unit,
+                                    spectral_axis_unit, data_unit)
 
     def is_data_unit_compatible(self, unit):
-        return (self.data_item.flux.unit == "" or
-                unit is not None and
-                self.data_item.flux.unit.is_equivalent(
-                    unit, equivalencies=spectral_density(self.spectral_axis)))
+        return is_data_unit_compatible(self.data_item.flux_unit,
+                                       self.data_item.spectral_axis_unit,
+                                       unit)
 
     def is_spectral_axis_unit_compatible(self, unit):
-        return (self.data_item.spectral_axis.unit == "" or
-                unit is not None and
-                self.data_item.spectral_axis.unit.is_equivalent(
-                    unit, equivalencies=spectral()))
+        return is_spectral_axis_unit_compatible(
+            self.data_item.spectral_axis_unit, unit)
 
     @Property(str, notify=spectral_axis_unit_changed)
     def spectral_axis_unit(self):
@@ -135,19 +297,308 @@ class PlotDataItem(pg.PlotDataItem):
         self.spectral_axis_unit_changed.emit(self._spectral_axis_unit)
 
     def reset_units(self):
-        self.data_unit = self.data_item.flux.unit.to_string()
-        self.spectral_axis_unit = self.data_item.spectral_axis.unit.to_string()
+        self.data_unit = self.data_item.flux_unit.to_string()
+        self.spectral_axis_unit = self.data_item.spectral_axis_unit.to_string()
+
+    def _converted(self, key, convert):
+        """
+        Retrieve a unit-converted array from the conversion cache, computing
+        it with ``convert`` if it is not present. Keys include the version of
+        the data item, so replacing its data invalidates previous entries.
+        If the item has a store, entries are acquired from it, and so shared
+        with other plot data items of the same data item.
+        """
+        version = self._data_item.version
+
+        # Conversions of replaced data can never be used again, so they are
+        # released rather than left to age out of the cache
+        if version != self._conversion_version:
+            for stale_key in [x for x in self._conversion_cache
+                              if x[0] != version]:
+                del self._conversion_cache[stale_key]
+                self._release(stale_key)
+
+            self._conversion_version = version
+
+        key = (version, self._display_precision) + key
+
+        if key not in self._conversion_cache:
+            if self._store is None:
+                value = convert()
+            else:
+                value = self._store.acquire(
+                    (self._data_item.identifier,) + key, convert)
+
+            self._conversion_cache[key] = value
+
+            if len(self._conversion_cache) > self.CONVERSION_CACHE_SIZE:
+                self._release(self._conversion_cache.popitem(last=False)[0])
+        else:
+            value = self._conversion_cache[key]
+            self._conversion_cache.move_to_end(key)
+
+        return value
+
+    def _release(self, key):
+        if self._store is not None:
+            self._store.release((self._data_item.identifier,) + key)
+
+    def release_conversions(self):
+        """
+        Drop the cached conversions of this item, releasing those acquired
+        from its store. They are recomputed or re-acquired as needed.
+        """
+        while self._conversion_cache:
+            self._release(self._conversion_cache.popitem()[0])
+
+    def converted_flux(self, unit):
+        """
+        The flux converted to the given unit. The flux density conversion is
+        evaluated along the stored spectral axis, so the result does not
+        depend on the displayed spectral axis unit.
+        """
+        def convert():
+            flux = self._data_item.flux
+            spectral_axis = self._data_item.spectral_axis
+
+            return convert_flux(flux.value, spectral_axis.value, flux.unit,
+                                unit, spectral_axis.unit,
+                                out=self._display_buffer(flux.shape))
+
+        return self._converted(('flux', unit), convert)
+
+    def converted_spectral_axis(self, unit):
+        """The spectral axis converted to the given unit."""
+        def convert():
+            spectral_axis = self._data_item.spectral_axis
+
+            return convert_spectral_axis(
+                spectral_axis.value, spectral_axis.unit, unit,
+                out=self._display_buffer(spectral_axis.shape))
+
+        return self._converted(('spectral_axis', unit), convert)
+
+    @classmethod
+    def _check_precision(cls, value):
+        if value not in cls.DISPLAY_DTYPES:
+            raise ValueError("Unknown display precision '{}'.".format(value))
+
+        return value
+
+    def _display_buffer(self, shape):
+        """An uninitialized array in which to store displayed values."""
+        return np.empty(shape,
+                        dtype=self.DISPLAY_DTYPES[self._display_precision])
+
+    @property
+    def display_precision(self):
+        """
+        Precision, ``'double'`` or ``'single'``, of the arrays the item is
+        drawn from. Single precision halves the memory of the displayed
+        arrays and the data copied on each redraw. Values are converted
+        straight into single precision buffers, without a double precision
+        intermediate.
+        """
+        return self._display_precision
+
+    @display_precision.setter
+    def display_precision(self, value):
+        value = self._check_precision(value)
+
+        if value != self._display_precision:
+            self._display_precision = value
+            self.set_data()
+
+    def prepare_units(self, data_unit, spectral_axis_unit):
+        """
+        Convert the data to the given units ahead of a call to
+        :meth:`set_units`, without modifying the item. This does not touch
+        any Qt state, so it may be run on a worker thread.
+        """
+        self.converted_spectral_axis(spectral_axis_unit)
+        self.converted_flux(data_unit)
+
+        if self.converted_flux(data_unit).size > self.DECIMATION_THRESHOLD:
+            self.converted_envelope(data_unit)
+
+    def set_units(self, data_unit, spectral_axis_unit):
+        """
+        Change both display units and redraw the item once, rather than once
+        per unit.
+        """
+        self._redraw_suspended = True
+
+        try:
+            self.data_unit = data_unit
+            self.spectral_axis_unit = spectral_axis_unit
+        finally:
+            self._redraw_suspended = False
+
+        self.set_data()
 
     @Property(list)
     def flux(self):
-        return self._data_item.flux.to(self.data_unit,
-                                       equivalencies=spectral_density(
-                                           self.spectral_axis)).value
+        return self.converted_flux(self.data_unit)
 
     @property
     def spectral_axis(self):
-        return self._data_item.spectral_axis.to(self.spectral_axis_unit,
-                                                equivalencies=spectral()).value
+        return self.converted_spectral_axis(self.spectral_axis_unit)
+
+    def converted_envelope(self, unit):
+        """
+        The min/max envelope pyramid of the flux in the given unit, built once
+        per spectrum and unit.
+        """
+        return self._converted(
+            ('envelope', unit),
+            lambda: EnvelopePyramid(self.converted_flux(unit)))
+
+    @property
+    def envelope(self):
+        """The min/max envelope pyramid of the flux in the current unit."""
+        return self.converted_envelope(self.data_unit)
+
+    @staticmethod
+    def _finite_extent(values):
+        finite = values[np.isfinite(values)]
+
+        if finite.size == 0:
+            return [None, None]
+
+        return [finite.min(), finite.max()]
+
+    @property
+    def data_bounds(self):
+        """
+        The finite minimum and maximum of the spectral axis and of the flux in
+        the current units, as ``[x_min, x_max], [y_min, y_max]``. Either
+        pair is ``[None, None]`` if the data has no finite values. Computed
+        once per spectrum and unit.
+        """
+        x_bounds = self._converted(
+            ('spectral_axis_extent', self.spectral_axis_unit),
+            lambda: self._finite_extent(self.spectral_axis))
+        y_bounds = self._converted(
+            ('flux_extent', self.data_unit),
+            lambda: self._finite_extent(self.flux))
+
+        return x_bounds, y_bounds
+
+    def dataBounds(self, ax, frac=1.0, orthoRange=None):
+        # Only part of the data may be drawn, so the full extent of the data
+        # is reported from the values cached for the current units
+        if frac >= 1.0 and orthoRange is None:
+            return self.data_bounds[ax]
+
+        return super(PlotDataItem, self).dataBounds(
+            ax, frac=frac, orthoRange=orthoRange)
+
+    def _axis_index(self):
+        """
+        Index used to find the values of the spectral axis within a range by
+        binary search, built once per spectrum and unit. Returns the order of
+        the axis, one of ``'ascending'``, ``'descending'``, or
+        ``'unsorted'``, the axis values in ascending order, and for unsorted
+        axes the permutation that sorts them.
+        """
+        def build():
+            spectral_axis = self.spectral_axis
+            steps = np.diff(spectral_axis)
+
+            if np.all(steps >= 0):
+                return 'ascending', spectral_axis, None
+            elif np.all(steps <= 0):
+                return 'descending', spectral_axis[::-1], None
+
+            permutation = np.argsort(spectral_axis, kind='stable')
+
+            return 'unsorted', spectral_axis[permutation], permutation
+
+        return self._converted(('axis_index', self.spectral_axis_unit), build)
+
+    def _finite_positions(self):
+        """
+        Positions of the values where both the spectral axis and the flux are
+        finite, computed once per spectrum and unit, or `None` if every value
+        is finite.
+        """
+        def build():
+            finite = np.isfinite(self.spectral_axis) & np.isfinite(self.flux)
+
+            if finite.all():
+                return
+
+            return np.flatnonzero(finite).astype(
+                np.int32 if finite.size < 2 ** 31 else np.int64)
+
+        return self._converted(
+            ('finite_positions', self.spectral_axis_unit, self.data_unit),
+            build)
+
+    def _span(self, view_min, view_max):
+        """
+        Positions in the sorted spectral axis of the values within a range,
+        along with one value either side so that lines reach the edges.
+        """
+        sorted_axis = self._axis_index()[1]
+
+        start = np.searchsorted(sorted_axis, view_min, side='left') - 1
+        stop = np.searchsorted(sorted_axis, view_max, side='right') + 1
+
+        return max(int(start), 0), min(int(stop), sorted_axis.size)
+
+    def _selection(self, margin=0.0):
+        """
+        Choose what to draw in the current view: the level of detail, such
+        that roughly one min/max pair is drawn per pixel, and the positions in
+        the sorted spectral axis of the values to draw, widened by ``margin``
+        view widths on either side.
+        """
+        size = self.flux.size
+
+        if self._view is None or size <= self.DECIMATION_THRESHOLD:
+            return 0, 0, size
+
+        (view_min, view_max), pixels = self._view
+
+        start, stop = self._span(view_min, view_max)
+        level = self.envelope.level_for(stop - start, pixels)
+
+        if margin > 0:
+            width = (view_max - view_min) * margin
+            start, stop = self._span(view_min - width, view_max + width)
+
+        return level, start, stop
+
+    def set_view(self, x_range, pixels):
+        """
+        Inform the item of the range and width of the view displaying it.
+        The item is only redrawn if the view has moved beyond the values
+        drawn, if it has zoomed in well within them, or if the level of
+        detail needs to change.
+
+        Parameters
+        ----------
+        x_range : tuple
+            The displayed range of the spectral axis.
+        pixels : int
+            The width of the view, in pixels.
+        """
+        self._view = (tuple(sorted(x_range)), max(int(pixels), 1))
+
+        level, start, stop = self._selection()
+
+        if self._drawn is None:
+            self.set_data()
+            return
+
+        drawn_level, drawn_start, drawn_stop = self._drawn
+        drawn_width = (1 + 2 * self.VIEW_MARGIN) * (stop - start)
+
+        if level != drawn_level or start < drawn_start or \
+                stop > drawn_stop or \
+                drawn_stop - drawn_start > 2 * drawn_width:
+            self.set_data()
 
     @Property(str, notify=color_changed)
     def color(self):
@@ -189,10 +640,77 @@ class PlotDataItem(pg.PlotDataItem):
 
     def update_data(self):
         # Replot data
-        self.setData(self.spectral_axis, self.flux, connect="finite")
+        self.set_data()
 
     def set_data(self):
-        self.setData(self.spectral_axis, self.flux, connect="finite")
+        if self._redraw_suspended:
+            return
+
+        spectral_axis, flux = self.spectral_axis, self.flux
+        size = flux.size
+        indices = None
+
+        # Draw the values in and around the view at the chosen level of
+        # detail. The extra margin lets the view pan without redrawing.
+        level, start, stop = self._selection(margin=self.VIEW_MARGIN)
+
+        if level > 0 or stop - start < size:
+            order, _, permutation = self._axis_index()
+
+            if order == 'unsorted':
+                if level > 0:
+                    # Decimated values cannot be clipped by position in the
+                    # sorted axis, so the whole level is drawn
+                    indices = self.envelope.indices(level)
+                    start, stop = 0, size
+                else:
+                    indices = np.sort(permutation[start:stop])
+            else:
+                first, last = (start, stop) if order == 'ascending' \
+                    else (size - stop, size - start)
+
+                indices = self.envelope.indices(level, first, last) \
+                    if level > 0 else slice(first, last)
+
+        self._drawn = (level, start, stop)
+
+        # Non-finite values are left out of the drawn data, and the lines
+        # between the values either side of them broken. This uses the cached
+        # positions of the finite values rather than having every redraw
+        # scan the data for them.
+        finite_positions = self._finite_positions()
+
+        if finite_positions is None:
+            connect = 'all'
+        else:
+            if indices is None:
+                indices = slice(0, size)
+
+            if isinstance(indices, slice):
+                # Contiguous values map to a contiguous run of finite ones
+                indices = finite_positions[
+                    np.searchsorted(finite_positions, indices.start):
+                    np.searchsorted(finite_positions, indices.stop)]
+                ranks = np.arange(indices.size)
+            elif finite_positions.size == 0:
+                indices = ranks = finite_positions
+            else:
+                ranks = np.searchsorted(finite_positions, indices)
+                is_finite = finite_positions[
+                    np.minimum(ranks, finite_positions.size - 1)] == indices
+                indices, ranks = indices[is_finite], ranks[is_finite]
+
+            # Neighbouring values are connected unless non-finite values lie
+            # between them, i.e. unless they are further apart in the data
+            # than among the finite values
+            connect = np.ones(indices.size, dtype=bool)
+            np.equal(np.diff(indices), np.diff(ranks), out=connect[:-1])
+
+        if indices is not None:
+            spectral_axis, flux = spectral_axis[indices], flux[indices]
+
+        self.setData(spectral_axis, flux, connect=connect,
+                     skipFiniteCheck=True)
 
 
 class ModelItem(QStandardItem):
@@ -0,0 +1,547 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+import threading
+
+import astropy.units as u
+from astropy.io import registry as io_registry
+from specutils import Spectrum1D
+
+from ..utils import SETTINGS_PATH
+from .cache import spectrum_cache
+
+#: Loader name used to request that the file format be detected automatically.
+AUTO_LOADER = 'auto'
+
+# FITS headers are made up of 2880 byte blocks of 80 character cards
+_FITS_BLOCK_SIZE = 2880
+_FITS_CARD_SIZE = 80
+_FITS_MAX_BLOCKS = 10
+
+# Header keywords whose values, and not just their presence, tend to decide
+# which loader is able to read a FITS file
+_FITS_SIGNATURE_VALUES = ('NAXIS', 'TELESCOP', 'INSTRUME')
+
+
+def expand_paths(paths):
+    """
+    Expand a collection of file paths, glob patterns, and directories into a
+    flat, ordered list of file paths. Directories contribute every
+    non-hidden file they directly contain. Duplicate paths are dropped.
+
+    Parameters
+    ----------
+    paths : str or list
+        Paths, glob patterns, or directories to expand.
+
+    Returns
+    -------
+    list
+        The expanded list of file paths.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    file_paths = []
+
+    for path in paths:
+        path = os.path.expanduser(path)
+
+        if os.path.isdir(path):
+            # Directory entries carry their type, avoiding a stat per file
+            file_paths.extend(sorted(
+                x.path for x in os.scandir(path)
+                if not x.name.startswith('.') and not x.is_dir()))
+        elif glob.has_magic(path):
+            file_paths.extend(x for x in sorted(glob.glob(path))
+                              if not os.path.isdir(x))
+        else:
+            file_paths.append(path)
+
+    # Preserve ordering while removing duplicate entries
+    return list(dict.fromkeys(file_paths))
+
+
+def file_signature(file_path):
+    """
+    Compute a signature describing the kind of file at the given path, such
+    that files which are read by the same loader generally share the same
+    signature. The signature combines the file extension with a fingerprint
+    of the file header: the keywords of a FITS primary header, the first line
+    of a text file with any numbers removed, or the leading bytes of any other
+    binary file.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+
+    Returns
+    -------
+    str
+        Hex digest identifying the kind of file.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    with open(file_path, 'rb') as f:
+        head = f.read(_FITS_BLOCK_SIZE)
+
+        if head.startswith(b'SIMPLE  ='):
+            fingerprint = []
+
+            for _ in range(_FITS_MAX_BLOCKS):
+                cards = [head[i:i + _FITS_CARD_SIZE].decode('ascii', 'replace')
+                         for i in range(0, len(head), _FITS_CARD_SIZE)]
+
+                for card in cards:
+                    keyword = card[:8].strip()
+
+                    if keyword in _FITS_SIGNATURE_VALUES:
+                        fingerprint.append(card.split('/')[0].strip())
+                    elif keyword:
+                        fingerprint.append(keyword)
+
+                if 'END' in fingerprint:
+                    break
+
+                head = f.read(_FITS_BLOCK_SIZE)
+
+                if not head:
+                    break
+
+            fingerprint = "\n".join(fingerprint)
+        elif b'\x00' not in head:
+            lines = head.decode('utf-8', 'replace').strip().splitlines()
+            fingerprint = re.sub(r'[-+.\deE]*\d[-+.\deE]*', '#',
+                                 lines[0] if lines else '')
+        else:
+            fingerprint = head[:16].hex()
+
+    return hashlib.sha1(
+        "{}|{}".format(extension, fingerprint).encode('utf-8')).hexdigest()
+
+
+class LoaderTable:
+    """
+    Persistent mapping of file signatures, as computed by
+    :func:`file_signature`, to the name of the loader that last read a file
+    with that signature. The table is shared between processes through a JSON
+    file in the specviz settings directory.
+
+    Parameters
+    ----------
+    path : str, optional
+        Location of the table on disk.
+    """
+    def __init__(self, path=None):
+        self._path = path or os.path.join(SETTINGS_PATH, "loader_table.json")
+        self._lock = threading.Lock()
+        self._table = self._read()
+
+    @property
+    def path(self):
+        """Location of the table on disk."""
+        return self._path
+
+    def _read(self):
+        try:
+            with open(self._path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, signature):
+        """Retrieve the loader name stored for the signature, if any."""
+        with self._lock:
+            return self._table.get(signature)
+
+    def set(self, signature, loader):
+        """
+        Store the loader name for the signature and write the table to disk.
+        Entries written by other processes since the table was last read are
+        preserved.
+        """
+        with self._lock:
+            if self._table.get(signature) == loader:
+                return
+
+            self._table = self._read()
+            self._table[signature] = loader
+
+            try:
+                os.makedirs(os.path.dirname(self._path), exist_ok=True)
+
+                # Write to a temporary file first so that the table on disk is
+                # never left partially written
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=os.path.dirname(self._path), suffix=".tmp")
+
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self._table, f)
+
+                os.replace(tmp_path, self._path)
+            except OSError as e:
+                logging.warning("Unable to save loader table: %s", e)
+
+
+_loader_table = None
+
+
+def loader_table():
+    """The loader table shared by all loads in this process."""
+    global _loader_table
+
+    if _loader_table is None:
+        _loader_table = LoaderTable()
+
+    return _loader_table
+
+
+def identify_loaders(file_path):
+    """
+    Run the registered format identifiers against a file.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+
+    Returns
+    -------
+    list
+        Names of the loaders that claim to be able to read the file.
+    """
+    return io_registry.identify_format(
+        'read', Spectrum1D, file_path, None, [], {})
+
+
+def resolve_loader(file_path, table=None):
+    """
+    Look up the loader previously found to read files like this one.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+    table : :class:`LoaderTable`, optional
+        The table to consult. Defaults to the shared table.
+
+    Returns
+    -------
+    str or None
+        The remembered loader name, or `None` if this kind of file has not
+        been seen before.
+    """
+    table = table or loader_table()
+
+    return table.get(file_signature(file_path))
+
+
+def read_spectrum_auto(file_path, table=None):
+    """
+    Parse a spectrum file without knowing its format in advance. The loader
+    remembered for files with the same signature is tried first. Otherwise,
+    the registered identifiers are run and each claiming loader is tried in
+    turn, falling back to every registered loader if none claim the file. The
+    loader that succeeds is remembered for subsequent files.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+    table : :class:`LoaderTable`, optional
+        The table to consult and update. Defaults to the shared table.
+
+    Returns
+    -------
+    : :class:`~specutils.Spectrum1D`
+        The parsed spectrum.
+    """
+    table = table or loader_table()
+    signature = file_signature(file_path)
+    known_loader = table.get(signature)
+
+    if known_loader is not None:
+        try:
+            return Spectrum1D.read(file_path, format=known_loader)
+        except Exception:
+            logging.info("Remembered loader '%s' failed to read '%s', "
+                         "identifying format.", known_loader, file_path)
+
+    candidates = identify_loaders(file_path) or \
+        list(io_registry.get_formats(Spectrum1D)['Format'])
+    errors = []
+
+    for loader in candidates:
+        if loader == known_loader:
+            continue
+
+        try:
+            spec = Spectrum1D.read(file_path, format=loader)
+        except Exception as e:
+            errors.append("{}: {}".format(loader, e))
+        else:
+            table.set(signature, loader)
+
+            return spec
+
+    raise IOError("No loader was able to read '{}'.\n{}".format(
+        file_path, "\n".join(errors)))
+
+
+def read_spectrum(file_path, file_loader=None, use_cache=True):
+    """
+    Parse a spectrum file. Previously parsed files are returned from the
+    spectrum cache, and newly parsed files are added to it. This is a
+    module-level function so that it can be dispatched to worker processes.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+    file_loader : str, optional
+        Format specified for the astropy io interface. If `None` or
+        ``'auto'``, the format is detected automatically.
+    use_cache : bool, optional
+        Whether to consult and update the spectrum cache.
+
+    Returns
+    -------
+    : :class:`~specutils.Spectrum1D`
+        The parsed spectrum.
+    """
+    auto = file_loader is None or file_loader == AUTO_LOADER
+    cache = spectrum_cache() if use_cache else None
+
+    # When detecting the format, only files whose kind has been seen before
+    # have a known loader with which to look up the cache
+    loader = resolve_loader(file_path) if auto else file_loader
+
+    if cache is not None and loader is not None:
+        spec = cache.get(file_path, loader)
+
+        if spec is not None:
+            return spec
+
+    if auto:
+        spec = read_spectrum_auto(file_path)
+        loader = resolve_loader(file_path)
+    else:
+        spec = Spectrum1D.read(file_path, format=file_loader)
+
+    if cache is not None and loader is not None:
+        cache.put(file_path, loader, spec)
+
+    return spec
+
+
+class SpectrumHandle:
+    """
+    Lightweight, picklable reference to a spectrum held in the spectrum
+    cache. The spectrum itself is only loaded, as memory-mapped arrays, when
+    :meth:`load` is called.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+    file_loader : str
+        Format used to parse the spectrum file, or ``'auto'`` if the file has
+        not yet been parsed and its format should be detected.
+    """
+    def __init__(self, file_path, file_loader):
+        self._file_path = file_path
+        self._file_loader = file_loader
+        self._meta = None
+
+        # Set once the cache has been found not to hold the units, so that
+        # compatibility checks of unloaded rows do not go back to the disk
+        self._units_missing = False
+
+    def __repr__(self):
+        return "<SpectrumHandle file_path='{}' file_loader='{}'>".format(
+            self._file_path, self._file_loader)
+
+    @property
+    def file_path(self):
+        """Path to location of the spectrum file."""
+        return self._file_path
+
+    @property
+    def file_loader(self):
+        """Format used to parse the spectrum file."""
+        return self._file_loader
+
+    @property
+    def flux_unit(self):
+        """The unit of the flux, read without loading the spectrum."""
+        return u.Unit(self._cache_meta().get('flux_unit', ''))
+
+    @property
+    def spectral_axis_unit(self):
+        """The unit of the spectral axis, read without loading the spectrum."""
+        return u.Unit(self._cache_meta().get('spectral_axis_unit', ''))
+
+    @property
+    def units_known(self):
+        """
+        Whether the units can be read without parsing the file, either
+        because they were read before or because the spectrum is cached.
+        The cache is consulted at most once until the spectrum is loaded, and
+        never for files whose format has not been detected yet, since that
+        means reading the file.
+        """
+        if self._meta is None and not self._units_missing:
+            self._units_missing = True
+
+            if self._file_loader != AUTO_LOADER:
+                try:
+                    self._meta = self._lookup_meta()
+                except OSError:
+                    pass
+
+        return self._meta is not None
+
+    def _lookup_meta(self):
+        loader = self._file_loader
+
+        if loader == AUTO_LOADER:
+            loader = resolve_loader(self._file_path)
+
+        if loader is not None:
+            return spectrum_cache().get_meta(self._file_path, loader)
+
+    def _cache_meta(self):
+        if self._meta is None:
+            self._meta = self._lookup_meta()
+
+            # If the file has not been parsed, or its entry has since been
+            # evicted, parse the file again
+            if self._meta is None:
+                self.load()
+
+        return self._meta
+
+    def load(self):
+        """
+        Load the spectrum. If its cache entry has been evicted, the file is
+        parsed again.
+
+        Returns
+        -------
+        : :class:`~specutils.Spectrum1D`
+            The spectrum, backed by memory-mapped arrays where possible.
+        """
+        spec = read_spectrum(self._file_path, self._file_loader)
+
+        self._meta = {
+            'flux_unit': spec.flux.unit.to_string(),
+            'spectral_axis_unit': spec.spectral_axis.unit.to_string()}
+        self._units_missing = False
+
+        return spec
+
+
+def read_spectrum_lazy(file_path, file_loader=None):
+    """
+    Ensure a spectrum file has been parsed into the spectrum cache and return
+    a :class:`SpectrumHandle` referencing it. If the spectrum cannot be
+    cached, the parsed spectrum itself is returned instead.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+    file_loader : str, optional
+        Format specified for the astropy io interface. If `None` or
+        ``'auto'``, the format is detected automatically.
+
+    Returns
+    -------
+    : :class:`SpectrumHandle` or :class:`~specutils.Spectrum1D`
+        A handle to the cached spectrum, or the parsed spectrum.
+    """
+    auto = file_loader is None or file_loader == AUTO_LOADER
+    loader = resolve_loader(file_path) if auto else file_loader
+
+    # Avoid building the spectrum at all if it is already cached
+    if loader is None or not spectrum_cache().contains(file_path, loader):
+        spec = read_spectrum(file_path, file_loader)
+        loader = resolve_loader(file_path) if auto else file_loader
+
+        if loader is None or not spectrum_cache().contains(file_path, loader):
+            return spec
+
+    return SpectrumHandle(file_path, loader)
+
+
+def read_spectrum_components(file_path, file_loader=None):
+    """
+    Parse a spectrum file and return it as plain, picklable objects: either a
+    :class:`SpectrumHandle` to the cached spectrum, or the components of the
+    spectrum. Spectra carrying a lookup-table WCS cannot be pickled, so worker
+    processes use this to send parsed data back to the main process, which
+    rebuilds the spectrum with :func:`spectrum_from_components`.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+    file_loader : str, optional
+        Format specified for the astropy io interface. If `None` or
+        ``'auto'``, the format is detected automatically.
+
+    Returns
+    -------
+    : :class:`SpectrumHandle`, dict, or None
+        A handle to the cached spectrum, or the flux, spectral axis,
+        uncertainty, mask, and meta data of the spectrum. `None` if the meta
+        data of the spectrum cannot be pickled, in which case the file must
+        be parsed in the calling process.
+    """
+    spec = read_spectrum_lazy(file_path, file_loader)
+
+    if isinstance(spec, SpectrumHandle):
+        return spec
+
+    try:
+        pickle.dumps(spec.meta)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return
+
+    return {'flux': spec.flux,
+            'spectral_axis': spec.spectral_axis,
+            'uncertainty': spec.uncertainty,
+            'mask': spec.mask,
+            'meta': spec.meta}
+
+
+def spectrum_from_components(components):
+    """
+    Rebuild a spectrum from the output of :func:`read_spectrum_components`.
+    Handles to cached spectra are returned as they are.
+
+    Parameters
+    ----------
+    components : :class:`SpectrumHandle` or dict
+        A handle to the cached spectrum, or the flux, spectral axis,
+        uncertainty, mask, and meta data of the spectrum.
+
+    Returns
+    -------
+    : :class:`SpectrumHandle` or :class:`~specutils.Spectrum1D`
+        The handle, or the rebuilt spectrum.
+    """
+    if isinstance(components, SpectrumHandle):
+        return components
+
+    return Spectrum1D(flux=components['flux'],
+                      spectral_axis=components['spectral_axis'],
+                      uncertainty=components['uncertainty'],
+                      mask=components['mask'],
+                      meta=components['meta'])
@@ -1,22 +1,66 @@
+import os
 import uuid
+from contextlib import contextmanager
 
 import astropy.units as u
 import numpy as np
-import qtawesome as qta
-from qtpy.QtCore import QSortFilterProxyModel, Qt
+from qtpy.QtCore import (QAbstractTableModel, QModelIndex,
+                         QSortFilterProxyModel, Qt, Signal)
 from qtpy.QtGui import QStandardItem, QStandardItemModel
 from specutils import Spectrum1D
 
-from .items import DataItem, PlotDataItem
+from ..utils.helper_functions import format_float_text
+from ..utils.qt_utils import IconCache
+from .cache import ConvertedArrayStore
+from .items import DataItem, PlotDataItem, flatui
+from .loaders import AUTO_LOADER, SpectrumHandle
+
+#: Number of pending catalog rows materialized each time a view asks for more.
+FETCH_BATCH_SIZE = 256
 
 
 class DataListModel(QStandardItemModel):
     """
     Base model for all data loaded into specviz.
+
+    Signals
+    -------
+    display_precision_changed : str
+        Fired when the precision in which plots display the data changes.
+    data_loaded : :class:`~specviz.core.items.DataItem`
+        Fired when the lazily held spectrum of a data item is loaded.
     """
+    display_precision_changed = Signal(str)
+    data_loaded = Signal(object)
+
     def __init__(self, *args, **kwargs):
         super(DataListModel, self).__init__(*args, **kwargs)
 
+        # Map data item identifiers to their items, making identifier lookups
+        # constant-time. Items track their own row as rows are inserted,
+        # removed, and moved. Persistent model indices are deliberately
+        # avoided, since Qt updates every one of them on each row removal.
+        self._id_index = {}
+
+        # Catalog rows not yet materialized into data items. Only the file
+        # path and loader of each row are held until a view scrolls far
+        # enough to need it.
+        self._pending_paths = []
+        self._pending_loaders = []
+        self._pending_start = 0
+
+        # Unit-converted arrays shared by the plot data items of every plot
+        # window showing data from this model
+        self._array_store = ConvertedArrayStore()
+        self._display_precision = 'double'
+
+        # Set while item flags are changed other than by the user
+        self._updating_flags = False
+
+        self.rowsInserted.connect(self._on_rows_inserted)
+        self.rowsAboutToBeRemoved.connect(self._on_rows_about_to_be_removed)
+        self.modelReset.connect(self._rebuild_id_index)
+
         spec1 = Spectrum1D(flux=np.random.sample(100) * u.Jy,
                            spectral_axis=np.arange(100) * u.AA)
         spec2 = Spectrum1D(flux=np.random.sample(100) * u.erg,
@@ -39,14 +83,172 @@ class DataListModel(QStandardItemModel):
         """
         return [self.item(idx) for idx in range(self.rowCount())]
 
+    @property
+    def is_updating_flags(self):
+        """Whether item flags are being changed in `updating_flags`."""
+        return self._updating_flags
+
+    @contextmanager
+    def updating_flags(self):
+        """
+        Context manager for changing item flags, e.g. enabling or disabling
+        items, other than by the user. Each change still emits `itemChanged`
+        and `dataChanged`, so that every proxy model and view repaints, but
+        listeners treating `itemChanged` as a click of the item's checkbox
+        can tell from `is_updating_flags` that it is not one.
+        """
+        previous, self._updating_flags = self._updating_flags, True
+
+        try:
+            yield
+        finally:
+            self._updating_flags = previous
+
+    @property
+    def array_store(self):
+        """
+        The :class:`~specviz.core.cache.ConvertedArrayStore` shared by the
+        plot data items of every plot window showing data from this model.
+        """
+        return self._array_store
+
+    @property
+    def display_precision(self):
+        """
+        Precision, ``'double'`` or ``'single'``, in which plots display the
+        data of this model. The data items always keep their spectra in full
+        precision.
+        """
+        return self._display_precision
+
+    @display_precision.setter
+    def display_precision(self, value):
+        if value not in PlotDataItem.DISPLAY_DTYPES:
+            raise ValueError("Unknown display precision '{}'.".format(value))
+
+        if value != self._display_precision:
+            self._display_precision = value
+            self.display_precision_changed.emit(value)
+
     def add_data(self, spec, name):
         """
+        Adds a spectrum to the model.
+
+        Parameters
+        ----------
+        spec : :class:`~specutils.Spectrum1D` or :class:`~specviz.core.loaders.SpectrumHandle`
+            The spectrum, or a handle to a cached spectrum which will only be
+            loaded once it is used.
+        name : str
+            The name of the new data item.
+
+        Returns
+        -------
+        : :class:`~specviz.core.items.DataItem`
+            The data item that was added.
         """
         data_item = DataItem(name, identifier=uuid.uuid4(), data=spec)
         self.appendRow(data_item)
 
         return data_item
 
+    def add_data_many(self, specs, names):
+        """
+        Adds several spectra to the model at once. All rows are inserted in a
+        single operation, so listeners receive one `rowsInserted` signal
+        spanning the new rows rather than one signal per row.
+
+        Parameters
+        ----------
+        specs : list
+            The :class:`~specutils.Spectrum1D` objects, or handles to cached
+            spectra, to add.
+        names : list
+            The names of the new data items.
+
+        Returns
+        -------
+        list
+            The :class:`~specviz.core.items.DataItem` objects that were added.
+        """
+        data_items = [DataItem(name, identifier=uuid.uuid4(), data=spec)
+                      for spec, name in zip(specs, names)]
+
+        if len(data_items) > 0:
+            self.invisibleRootItem().appendRows(data_items)
+
+        return data_items
+
+    def add_catalog(self, file_paths, file_loader=None):
+        """
+        Adds a catalog of spectrum files to the model without reading them.
+        Rows are materialized into data items in batches as attached views
+        request them through :meth:`fetchMore`, and each spectrum is only
+        parsed once it is used.
+
+        Parameters
+        ----------
+        file_paths : list
+            Paths to the spectrum files.
+        file_loader : str, optional
+            Format specified for the astropy io interface. If `None` or
+            ``'auto'``, the format of each file is detected automatically.
+
+        Returns
+        -------
+        int
+            The number of files added to the catalog.
+        """
+        file_paths = list(file_paths)
+
+        self._pending_paths.extend(file_paths)
+        self._pending_loaders.extend(
+            [file_loader or AUTO_LOADER] * len(file_paths))
+
+        return len(file_paths)
+
+    @property
+    def pending_count(self):
+        """The number of catalog rows not yet materialized."""
+        return len(self._pending_paths) - self._pending_start
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+
+        return self.pending_count > 0
+
+    def fetchMore(self, parent=QModelIndex()):
+        """
+        Materializes the next batch of pending catalog rows. Each row holds a
+        :class:`~specviz.core.loaders.SpectrumHandle`, so no file is parsed
+        until its spectrum is used.
+        """
+        if not self.canFetchMore(parent):
+            return
+
+        start = self._pending_start
+        stop = min(start + FETCH_BATCH_SIZE, len(self._pending_paths))
+
+        data_items = [
+            DataItem(os.path.basename(file_path).split('.')[0],
+                     identifier=uuid.uuid4(),
+                     data=SpectrumHandle(file_path, file_loader))
+            for file_path, file_loader in zip(
+                self._pending_paths[start:stop],
+                self._pending_loaders[start:stop])]
+
+        # Release the pending table once it is exhausted, rather than
+        # shifting it on every batch
+        if stop == len(self._pending_paths):
+            self._pending_paths = []
+            self._pending_loaders = []
+            self._pending_start = 0
+        else:
+            self._pending_start = stop
+
+        self.invisibleRootItem().appendRows(data_items)
+
     def remove_data(self, identifier):
         """
         Removes data given the data item's UUID.
@@ -59,10 +261,84 @@ class DataListModel(QStandardItemModel):
         item = self.item_from_id(identifier)
 
         if item is not None:
-            self.removeRow(item.index().row())
+            self.removeRow(item.row())
+
+    def remove_data_many(self, identifiers):
+        """
+        Removes several data items given their UUIDs. Rows are removed in
+        contiguous runs, so removing a block of neighbouring items gives
+        listeners a single `rowsRemoved` signal rather than one per row.
+
+        Parameters
+        ----------
+        identifiers : list
+            Assigned ids of the :class:`~specviz.core.items.DataItem` objects.
+
+        Returns
+        -------
+        int
+            The number of data items removed.
+        """
+        rows = sorted({item.row() for item in map(self.item_from_id,
+                                                  identifiers)
+                       if item is not None}, reverse=True)
+
+        # Group into runs of neighbouring rows, working from the bottom of the
+        # model so that removing a run does not shift those still to come
+        runs = []
+
+        for row in rows:
+            if runs and runs[-1][0] == row + 1:
+                runs[-1][0] = row
+                runs[-1][1] += 1
+            else:
+                runs.append([row, 1])
+
+        for start, count in runs:
+            self.removeRows(start, count)
+
+        return len(rows)
 
     def item_from_id(self, identifier):
-        return next((x for x in self.items if x.identifier == identifier))
+        """
+        Retrieves a data item given its UUID.
+
+        Parameters
+        ----------
+        identifier : :class:`~uuid.UUID`
+            Assigned id of the :class:`~specviz.core.items.DataItem` object.
+
+        Returns
+        -------
+        : :class:`~specviz.core.items.DataItem` or None
+            The data item, or `None` if no item has the given id.
+        """
+        return self._id_index.get(identifier)
+
+    def _on_rows_inserted(self, parent, first, last):
+        if parent.isValid():
+            return
+
+        for row in range(first, last + 1):
+            item = self.item(row)
+
+            if isinstance(item, DataItem):
+                self._id_index[item.identifier] = item
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        if parent.isValid():
+            return
+
+        for row in range(first, last + 1):
+            item = self.item(row)
+
+            if isinstance(item, DataItem):
+                self._id_index.pop(item.identifier, None)
+                self._array_store.discard(item.identifier)
+
+    def _rebuild_id_index(self):
+        self._id_index = {}
+        self._on_rows_inserted(QModelIndex(), 0, self.rowCount() - 1)
 
     def data(self, index, role=Qt.DisplayRole):
         """
@@ -77,7 +353,7 @@ class DataListModel(QStandardItemModel):
         if role == Qt.DisplayRole:
             return item.data(item.NameRole)
         elif role == item.DataRole:
-            return item.data(item.DataRole)
+            return item.spectrum
         elif role == Qt.UserRole:
             return item
 
@@ -97,53 +373,170 @@ class DataListModel(QStandardItemModel):
 
 
 class PlotProxyModel(QSortFilterProxyModel):
+    # Visibility icons shown beside each row, shared by every proxy model.
+    # Rows only differ in visibility and color, so a handful of icons serve
+    # the whole list.
+    icon_cache = IconCache()
+
     def __init__(self, source=None, *args, **kwargs):
         super(PlotProxyModel, self).__init__(*args, **kwargs)
 
+        # Plot data items are only created once a row is plotted or its plot
+        # item is explicitly requested. Until then, rows are displayed from
+        # the data item and the color reserved for it.
+        self._items = {}
+        self._colors = {}
+
         self.setSourceModel(source)
+
+    def setSourceModel(self, source):
+        previous = self.sourceModel()
+
+        if previous is not None:
+            previous.rowsAboutToBeRemoved.disconnect(
+                self._on_source_rows_about_to_be_removed)
+            previous.modelReset.disconnect(self._on_source_model_reset)
+
+            if isinstance(previous, DataListModel):
+                previous.display_precision_changed.disconnect(
+                    self._on_display_precision_changed)
+
+        self._release_items(self._items.values())
+        self._items = {}
+        self._colors = {}
+
+        super(PlotProxyModel, self).setSourceModel(source)
+
+        # Connected after the proxy's own handlers, so that listeners of the
+        # proxy model still see the plot data items of removed rows
+        if source is not None:
+            source.rowsAboutToBeRemoved.connect(
+                self._on_source_rows_about_to_be_removed)
+            source.modelReset.connect(self._on_source_model_reset)
+
+            if isinstance(source, DataListModel):
+                source.display_precision_changed.connect(
+                    self._on_display_precision_changed)
+
+    def _on_source_rows_about_to_be_removed(self, parent, first, last):
+        if parent.isValid():
+            return
+
+        source = self.sourceModel()
+
+        for row in range(first, last + 1):
+            identifier = source.item(row).identifier
+
+            self._release_items([self._items.pop(identifier, None)])
+            self._colors.pop(identifier, None)
+
+    def _on_source_model_reset(self):
+        self._release_items(self._items.values())
+        self._items = {}
+        self._colors = {}
+
+    def _on_display_precision_changed(self, value):
+        for item in self._items.values():
+            item.display_precision = value
+
+    @staticmethod
+    def _release_items(items):
+        """
+        Release the converted arrays held by plot data items that are no
+        longer used, so that they can be dropped from the shared store.
+        """
+        for item in items:
+            if item is not None:
+                item.release_conversions()
+
+    def release(self):
+        """
+        Release every plot data item of this proxy model, e.g. once the plot
+        window using it is closed.
+        """
+        self._release_items(self._items.values())
         self._items = {}
 
+    def _color_for(self, identifier):
+        """The color reserved for the plot data item of a data item."""
+        if identifier not in self._colors:
+            self._colors[identifier] = next(flatui)
+
+        return self._colors[identifier]
+
+    def _create_item(self, data_item):
+        source = self.sourceModel()
+        item = PlotDataItem(
+            data_item, color=self._color_for(data_item.identifier),
+            store=getattr(source, 'array_store', None),
+            display_precision=getattr(source, 'display_precision', 'double'))
+        self._items[data_item.identifier] = item
+
+        return item
+
     @property
     def items(self):
         """Returns a list of :class:`PlotDataItems` in the proxy model."""
         return self._items.values()
 
-    def item_from_index(self, index):
+    def item_from_index(self, index, create=True):
+        """
+        Retrieves the :class:`~specviz.core.items.PlotDataItem` for a row of
+        the proxy model.
+
+        Parameters
+        ----------
+        index : :class:`~qtpy.QtCore.QModelIndex`
+            Index of the row in the proxy model.
+        create : bool, optional
+            Whether to create the plot data item if it does not yet exist. If
+            `False`, `None` is returned for rows without one.
+        """
         index = self.mapToSource(index)
         data_item = self.sourceModel().data(index, role=Qt.UserRole)
 
-        if data_item.identifier not in self._items:
-            self._items[data_item.identifier] = PlotDataItem(data_item)
-
         item = self._items.get(data_item.identifier)
 
+        if item is None and create:
+            item = self._create_item(data_item)
+
         return item
 
     def item_from_id(self, identifier):
         data_item = self.sourceModel().item_from_id(identifier)
 
-        if data_item.identifier not in self._items:
-            self._items[data_item.identifier] = PlotDataItem(data_item)
+        if data_item is None:
+            return
 
         item = self._items.get(data_item.identifier)
+
+        if item is None:
+            item = self._create_item(data_item)
+
         return item
 
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid():
             return
 
-        item = self.item_from_index(index)
+        if role == Qt.UserRole:
+            return self.item_from_index(index)
+
+        # Painting the list only needs the name, color, and visibility of
+        # each row, none of which require a plot data item to be created
+        data_item = self.sourceModel().itemFromIndex(self.mapToSource(index))
+        item = self._items.get(data_item.identifier)
+        visible = item is not None and item.visible
 
         if role == Qt.DisplayRole:
-            return item._data_item.name
+            return data_item.name
         elif role == Qt.DecorationRole:
-            icon = qta.icon('fa.eye' if item.visible else 'fa.eye-slash',
-                            color=item.color)
-            return icon
-        elif role == Qt.UserRole:
-            return item
+            color = item.color if item is not None else \
+                self._color_for(data_item.identifier)
+            return self.icon_cache.icon(
+                'fa.eye' if visible else 'fa.eye-slash', color)
         elif role == Qt.CheckStateRole:
-            return Qt.Checked if item.visible else ~Qt.Checked
+            return Qt.Checked if visible else ~Qt.Checked
 
         return super(PlotProxyModel, self).data(index, role)
 
@@ -162,4 +555,85 @@ class PlotProxyModel(QSortFilterProxyModel):
 
             return True
 
-        return super(PlotProxyModel, self).setData(index, value, role)
\ No newline at end of file
+        return super(PlotProxyModel, self).setData(index, value, role)
+
+
+class TableModel(QAbstractTableModel):
+    """
+    Read-only model of an :class:`~astropy.table.Table`, e.g. a table of
+    statistics. Floating point values are displayed formatted, and exposed
+    unformatted through `SortRole`, so that a `QSortFilterProxyModel` using
+    that role sorts rows numerically.
+
+    Parameters
+    ----------
+    table : :class:`~astropy.table.Table`, optional
+        The table to display.
+    """
+    SortRole = Qt.UserRole + 1
+
+    def __init__(self, table=None, *args, **kwargs):
+        super(TableModel, self).__init__(*args, **kwargs)
+
+        self._table = None
+        self._columns = []
+
+        self.table = table
+
+    @property
+    def table(self):
+        """The displayed table."""
+        return self._table
+
+    @table.setter
+    def table(self, value):
+        self.beginResetModel()
+
+        self._table = value
+
+        # Cells are read from plain arrays, which is much faster than going
+        # through the columns of the table for every cell painted
+        self._columns = [] if value is None else \
+            [np.asarray(column) for column in value.columns.values()]
+
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._table is None:
+            return 0
+
+        return len(self._table)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self._columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return
+
+        value = self._columns[index.column()][index.row()]
+
+        if role == Qt.DisplayRole:
+            if isinstance(value, np.floating):
+                return format_float_text(value)
+
+            return str(value)
+        elif role == self.SortRole:
+            return value.item()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return
+
+        if orientation == Qt.Vertical:
+            return str(section + 1)
+
+        column = self._table.columns[section]
+
+        if column.unit is not None:
+            return "{} ({})".format(column.name, column.unit)
+
+        return column.name
@@ -0,0 +1,420 @@
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from qtpy.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from .loaders import (read_spectrum_components, read_spectrum_lazy,
+                      spectrum_from_components)
+
+
+class FileLoadWorkerSignals(QObject):
+    """
+    Signals available from a running :class:`FileLoadWorker`. `QRunnable`
+    objects are not `QObject`s and so cannot define signals themselves.
+
+    Signals
+    -------
+    result : Signal
+        Delivers the file path and the parsed :class:`~specutils.Spectrum1D`,
+        or a :class:`~specviz.core.loaders.SpectrumHandle` to it.
+    exception : Signal
+        Delivers the file path and the exception raised while parsing.
+    finished : Signal
+        Delivers the file path once the worker is done, regardless of the
+        outcome of the parse.
+    """
+    result = Signal(str, object)
+    exception = Signal(str, Exception)
+    finished = Signal(str)
+
+    def __init__(self, cancel_event, *args, **kwargs):
+        super(FileLoadWorkerSignals, self).__init__(*args, **kwargs)
+        self.cancel_event = cancel_event
+
+
+class FileLoadWorker(QRunnable):
+    """
+    Parses a single spectrum file on a pooled worker thread, or waits on a
+    worker process to parse it if an executor is given.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to location of the spectrum file.
+    file_loader : str
+        Format specified for the astropy io interface, or ``'auto'`` to
+        detect the format.
+    cancel_event : :class:`threading.Event`
+        Shared event used to abandon the load. Workers that have not yet
+        started skip parsing entirely; workers already parsing drop their
+        result.
+    executor : :class:`~concurrent.futures.Executor`, optional
+        Executor in which the file is parsed. If `None`, the file is parsed
+        on the worker thread itself.
+    """
+    def __init__(self, file_path, file_loader, cancel_event, executor=None):
+        super(FileLoadWorker, self).__init__()
+
+        self._file_path = file_path
+        self._file_loader = file_loader
+        self._cancel_event = cancel_event
+        self._executor = executor
+
+        self.signals = FileLoadWorkerSignals(cancel_event)
+
+    def run(self):
+        """Run the worker."""
+        try:
+            if self._cancel_event.is_set():
+                return
+
+            components = None
+
+            if self._executor is not None:
+                components = self._executor.submit(
+                    read_spectrum_components, self._file_path,
+                    self._file_loader).result()
+
+            # Spectra whose meta data cannot be sent back from the worker
+            # process are parsed on the worker thread instead
+            if components is not None:
+                spec = spectrum_from_components(components)
+            else:
+                spec = read_spectrum_lazy(self._file_path, self._file_loader)
+
+            if not self._cancel_event.is_set():
+                self.signals.result.emit(self._file_path, spec)
+        except Exception as e:
+            if not self._cancel_event.is_set():
+                self.signals.exception.emit(self._file_path, e)
+        finally:
+            self.signals.finished.emit(self._file_path)
+
+
+class FileLoadManager(QObject):
+    """
+    Dispatches spectrum files to a pool of worker threads so that parsing does
+    not block the GUI thread. When several files are loaded at once, parsing
+    is handed off to a pool of worker processes so that files are parsed in
+    parallel rather than contending for the interpreter lock. Results are
+    delivered through signals on the thread that owns the manager, so
+    receivers may safely modify Qt models.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Maximum number of files parsed concurrently. Defaults to the number
+        of available cores.
+
+    Signals
+    -------
+    file_loaded : Signal
+        Delivers the file path and parsed :class:`~specutils.Spectrum1D`, or
+        a :class:`~specviz.core.loaders.SpectrumHandle` to it.
+    file_failed : Signal
+        Delivers the file path and the exception raised while parsing.
+    progress : Signal
+        Delivers the number of completed files and the total number of files
+        in the current load.
+    finished : Signal
+        Fired when every queued file has either completed or been cancelled.
+    """
+    file_loaded = Signal(str, object)
+    file_failed = Signal(str, Exception)
+    progress = Signal(int, int)
+    finished = Signal()
+
+    def __init__(self, max_workers=None, *args, **kwargs):
+        super(FileLoadManager, self).__init__(*args, **kwargs)
+
+        self._pool = QThreadPool(self)
+
+        if max_workers is not None:
+            self._pool.setMaxThreadCount(max_workers)
+
+        # The process pool is only started once it is first needed
+        self._executor = None
+
+        self._cancel_event = threading.Event()
+        self._workers = set()
+        self._completed = 0
+        self._total = 0
+
+    @property
+    def is_running(self):
+        """Whether any files are still queued or being parsed."""
+        return self._completed < self._total
+
+    def load(self, file_paths, file_loader):
+        """
+        Queue files for parsing. Files may be queued while a previous load is
+        still running, in which case they are counted as part of that load.
+
+        Parameters
+        ----------
+        file_paths : list
+            Paths to the spectrum files.
+        file_loader : str
+            Format specified for the astropy io interface, or ``'auto'`` to
+            detect the format of each file.
+        """
+        file_paths = list(file_paths)
+
+        # Spinning up worker processes is only worth it for multiple files
+        executor = self.executor if len(file_paths) > 1 else None
+
+        for file_path in file_paths:
+            worker = FileLoadWorker(file_path, file_loader,
+                                    self._cancel_event, executor=executor)
+            worker.signals.result.connect(self._on_worker_result)
+            worker.signals.exception.connect(self._on_worker_exception)
+            worker.signals.finished.connect(self._on_worker_finished)
+
+            # Hold a reference to the worker signals until the worker has
+            # reported back, otherwise they may be garbage collected early
+            self._workers.add(worker.signals)
+            self._total += 1
+
+            self._pool.start(worker)
+
+        self.progress.emit(self._completed, self._total)
+
+    @property
+    def executor(self):
+        """The process pool used to parse files in parallel."""
+        if self._executor is None:
+            kwargs = {'max_workers': self._pool.maxThreadCount()}
+
+            # Forking a process that has Qt threads running is not safe, so
+            # start workers in fresh interpreters where supported
+            if sys.version_info >= (3, 7):
+                kwargs['mp_context'] = multiprocessing.get_context('spawn')
+
+            self._executor = ProcessPoolExecutor(**kwargs)
+
+        return self._executor
+
+    def shutdown(self):
+        """Cancel any running load and stop the worker processes."""
+        self.cancel()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def cancel(self):
+        """
+        Abandon the current load. Parsed results that arrive after this call
+        are dropped.
+        """
+        self._cancel_event.set()
+
+        # Any subsequent loads get a fresh event so they are unaffected
+        self._cancel_event = threading.Event()
+
+    def _on_worker_result(self, file_path, spec):
+        # Results may already be queued on this thread when a load is
+        # cancelled, so check the cancel state again before delivering
+        if not self.sender().cancel_event.is_set():
+            self.file_loaded.emit(file_path, spec)
+
+    def _on_worker_exception(self, file_path, exception):
+        if not self.sender().cancel_event.is_set():
+            self.file_failed.emit(file_path, exception)
+
+    def _on_worker_finished(self, file_path):
+        self._workers.discard(self.sender())
+        self._completed += 1
+        self.progress.emit(self._completed, self._total)
+
+        if self._completed >= self._total:
+            self._completed = 0
+            self._total = 0
+            self.finished.emit()
+
+
+class TaskWorkerSignals(QObject):
+    """
+    Signals available from a running :class:`TaskWorker`.
+
+    Signals
+    -------
+    result : Signal
+        Delivers the generation of the task and its return value.
+    exception : Signal
+        Delivers the generation of the task and the exception it raised.
+    finished : Signal
+        Delivers the generation of the task once the worker is done, whether
+        or not the task ran.
+    """
+    result = Signal(int, object)
+    exception = Signal(int, Exception)
+    finished = Signal(int)
+
+
+class TaskWorker(QRunnable):
+    """
+    Calls a function on a pooled worker thread.
+
+    Parameters
+    ----------
+    generation : int
+        Identifies the request the task was submitted for.
+    is_current : callable
+        Called with the generation before the task runs. The task is skipped
+        if it returns `False`, i.e. the request has been superseded.
+    func : callable
+        The task.
+    args, kwargs
+        Arguments the task is called with.
+    """
+    def __init__(self, generation, is_current, func, *args, **kwargs):
+        super(TaskWorker, self).__init__()
+
+        self._generation = generation
+        self._is_current = is_current
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+        self.signals = TaskWorkerSignals()
+
+    def run(self):
+        """Run the worker."""
+        try:
+            if self._is_current(self._generation):
+                self.signals.result.emit(
+                    self._generation, self._func(*self._args, **self._kwargs))
+        except Exception as e:
+            self.signals.exception.emit(self._generation, e)
+        finally:
+            self.signals.finished.emit(self._generation)
+
+
+class LatestTaskRunner(QObject):
+    """
+    Runs tasks off the GUI thread when only the result of the most recent
+    request matters, e.g. statistics of the currently selected region.
+
+    Requests submitted while a task is running, or within the same pass of
+    the event loop, are coalesced so that only the latest one runs once the
+    worker is free. Results of superseded or cancelled requests are dropped,
+    so receivers only ever see the result of the latest request. Tasks run
+    one at a time, so they need not guard state they share with each other.
+
+    Parameters
+    ----------
+    parent : :class:`~qtpy.QtCore.QObject`, optional
+        Parent of the runner.
+
+    Signals
+    -------
+    result : Signal
+        Delivers the return value of the latest task.
+    exception : Signal
+        Delivers the exception raised by the latest task.
+    """
+    result = Signal(object)
+    exception = Signal(Exception)
+
+    def __init__(self, parent=None):
+        super(LatestTaskRunner, self).__init__(parent)
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._generation = 0
+        self._pending = None
+        self._running = None
+
+        # Starting on the next pass of the event loop lets requests fired
+        # by several signals for the same user action coalesce into one
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._start_pending)
+
+    @property
+    def busy(self):
+        """Whether a task is running or waiting to run."""
+        return self._running is not None or self._pending is not None
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Request that a task be run, superseding any earlier request.
+
+        Parameters
+        ----------
+        func : callable
+            The task. It is called on a worker thread, and so must not
+            touch any widgets.
+        args, kwargs
+            Arguments the task is called with.
+        """
+        self._generation += 1
+        self._pending = (self._generation, func, args, kwargs)
+
+        if self._running is None and not self._timer.isActive():
+            self._timer.start()
+
+    def cancel(self):
+        """
+        Abandon all requests. A task already running is left to finish, but
+        its result is dropped.
+        """
+        self._generation += 1
+        self._pending = None
+        self._timer.stop()
+
+    def wait(self, msecs=-1):
+        """
+        Block until the running task, if any, has finished.
+
+        Parameters
+        ----------
+        msecs : int, optional
+            Maximum time to wait, in milliseconds. Waits indefinitely by
+            default.
+
+        Returns
+        -------
+        bool
+            Whether the worker is idle.
+        """
+        return self._pool.waitForDone(msecs)
+
+    def _is_current(self, generation):
+        return generation == self._generation
+
+    def _start_pending(self):
+        if self._pending is None or self._running is not None:
+            return
+
+        generation, func, args, kwargs = self._pending
+        self._pending = None
+
+        worker = TaskWorker(generation, self._is_current, func,
+                            *args, **kwargs)
+        worker.signals.result.connect(self._on_worker_result)
+        worker.signals.exception.connect(self._on_worker_exception)
+        worker.signals.finished.connect(self._on_worker_finished)
+
+        # Hold a reference to the worker signals until the worker has
+        # reported back, otherwise they may be garbage collected early
+        self._running = worker.signals
+
+        self._pool.start(worker)
+
+    def _on_worker_result(self, generation, result):
+        if self._is_current(generation):
+            self.result.emit(result)
+
+    def _on_worker_exception(self, generation, exception):
+        if self._is_current(generation):
+            self.exception.emit(exception)
+
+    def _on_worker_finished(self, generation):
+        self._running = None
+        self._start_pending()
@@ -1 +1,2 @@
-from .statistics_widget import StatisticsWidget
\ No newline at end of file
+from .statistics_widget import StatisticsWidget
+from .batch_statistics import BatchStatisticsDialog
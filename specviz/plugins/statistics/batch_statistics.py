@@ -0,0 +1,125 @@
+import os
+
+from qtpy.QtCore import QSortFilterProxyModel
+from qtpy.QtWidgets import QDialog, QFileDialog, QMessageBox
+from qtpy.uic import loadUi
+
+from ...core.models import TableModel
+from ...core.plugin import Plugin, tool_bar
+from ...core.threads import LatestTaskRunner
+from ...utils.statistics import batch_region_stats
+
+#: File dialog filters of the export formats, and their astropy io formats.
+EXPORT_FORMATS = {"ECSV (*.ecsv)": 'ascii.ecsv',
+                  "CSV (*.csv)": 'ascii.csv'}
+
+
+@tool_bar("Batch Statistics", location="Operations")
+def on_action_triggered():
+    dialog = BatchStatisticsDialog()
+    dialog.exec_()
+
+
+class BatchStatisticsDialog(QDialog, Plugin):
+    """
+    Dialog that tabulates the statistics of every loaded spectrum over every
+    region of the current plot window. Statistics are computed off the GUI
+    thread, and the table can be sorted by any column and exported.
+    """
+    def __init__(self, parent=None, *args, **kwargs):
+        super().__init__(parent=parent, *args, **kwargs)
+
+        self._table_model = TableModel(parent=self)
+
+        self._runner = LatestTaskRunner(self)
+        self._runner.result.connect(self._on_statistics_computed)
+        self._runner.exception.connect(self._on_statistics_failed)
+
+        self._load_ui()
+
+    def _load_ui(self):
+        loadUi(os.path.abspath(
+            os.path.join(os.path.dirname(__file__),
+                         ".", "batch_statistics.ui")), self)
+
+        # Sort on the unformatted values, so numbers sort numerically
+        sort_model = QSortFilterProxyModel(self)
+        sort_model.setSortRole(TableModel.SortRole)
+        sort_model.setSourceModel(self._table_model)
+        self.table_view.setModel(sort_model)
+
+        self.compute_button.clicked.connect(self.compute)
+        self.export_button.clicked.connect(self.export)
+        self.close_button.clicked.connect(self.close)
+
+    def compute(self):
+        """
+        Compute the statistics of every data item over every region of the
+        current plot window.
+        """
+        regions = self.plot_widget.regions_bounds \
+            if self.plot_window is not None else []
+        data_items = self.data_items
+
+        if len(regions) == 0 or len(data_items) == 0:
+            self.status_label.setText("Add data and regions to compute "
+                                      "statistics over.")
+            return
+
+        # Spectra not yet loaded are loaded by the worker threads, and only
+        # for as long as their statistics are being computed
+        spectra = []
+
+        for data_item in data_items:
+            if data_item.is_materialized:
+                spectra.append(data_item.spectrum)
+            else:
+                spectra.append(data_item.data(data_item.DataRole).load)
+
+        self.compute_button.setEnabled(False)
+        self.status_label.setText(
+            "Computing statistics of {} spectra over {} regions...".format(
+                len(spectra), len(regions)))
+
+        self._runner.submit(batch_region_stats, spectra, regions,
+                            names=[data_item.name for data_item in data_items])
+
+    def _on_statistics_computed(self, table):
+        self._table_model.table = table
+        self.table_view.resizeColumnsToContents()
+
+        self.compute_button.setEnabled(True)
+        self.export_button.setEnabled(True)
+        self.status_label.setText("{} rows.".format(len(table)))
+
+    def _on_statistics_failed(self, exception):
+        self.compute_button.setEnabled(True)
+        self.status_label.setText(
+            "Statistics could not be computed: {}".format(exception))
+
+    def export(self):
+        """Write the table of statistics to an ECSV or CSV file."""
+        file_path, file_filter = QFileDialog.getSaveFileName(
+            self, "Export Statistics", "", ";;".join(EXPORT_FORMATS))
+
+        if not file_path:
+            return
+
+        file_format = EXPORT_FORMATS.get(file_filter, 'ascii.ecsv')
+
+        try:
+            self._table_model.table.write(file_path, format=file_format,
+                                          overwrite=True)
+        except Exception as e:
+            info_box = QMessageBox(parent=self)
+            info_box.setWindowTitle("Export Error")
+            info_box.setIcon(QMessageBox.Critical)
+            info_box.setText(str(e))
+            info_box.setStandardButtons(QMessageBox.Ok)
+            info_box.show()
+
+    def closeEvent(self, event):
+        # Results that arrive after the dialog is closed are of no use
+        self._runner.cancel()
+
+        super().closeEvent(event)
@@ -1,4 +1,6 @@
 import os
+from collections import OrderedDict
+
 import numpy as np
 
 from astropy import units as u
@@ -11,13 +13,18 @@ from qtpy.uic import loadUi
 from qtpy.QtGui import QIcon
 
 from ...core.items import PlotDataItem
+from ...core.threads import LatestTaskRunner
 from ...utils import UI_PATH
 from ...utils.helper_functions import format_float_text
+from ...utils.statistics import RegionStatsIndex, fused_stats, median
 from ...core.plugin import Plugin, plugin_bar
 
+#: Number of spectra whose statistics index is retained.
+STATS_INDEX_CACHE_SIZE = 4
+
 
 """
-The next three functions are place holders while specutils is updated to handle
+The next two functions are place holders while specutils is updated to handle
 these computations internally. They will be moved into the StatisticsWidget
 once they are updated.
 """
@@ -32,39 +39,46 @@ def check_unit_compatibility(spec, region):
     return spec_unit.is_equivalent(region_unit)
 
 
-def clip_region(spectrum, region):
-    # If the region is out of data range return None:
-    if region.lower > spectrum.spectral_axis.max() or \
-            region.upper < spectrum.spectral_axis.min():
-        return None
-
-    # Clip region:
-    if region.lower < spectrum.spectral_axis.min():
-        region.lower = spectrum.spectral_axis.min()
-    if region.upper > spectrum.spectral_axis.max():
-        region.upper = spectrum.spectral_axis.max()
-    return region
-
-
 def compute_stats(spectrum):
     """
-    Compute basic statistics for a spectral region.
+    Compute basic statistics for a whole spectrum.
     Parameters
     ----------
     spectrum : `~specutils.spectra.spectrum1d.Spectrum1D`
-    region: `~specutils.utils.SpectralRegion`
     """
     flux = spectrum.flux
-    mean = flux.mean()
-    rms = np.sqrt(flux.dot(flux) / len(flux))
-    return {'mean': mean,
-            'median': np.median(flux),
-            'stddev': flux.std(),
-            'rms': rms,
-            'snr': mean / rms,  # snr(spectrum=spectrum),
-            'total': np.trapz(flux),
-            'maxval': flux.max(),
-            'minval': flux.min()}
+    values = np.asarray(flux.value, dtype=float)
+
+    # Moments, extrema, and integral in one pass over the raw values
+    stats = fused_stats(values)
+    stats['median'] = median(values)
+
+    return _stats_to_quantities(stats, flux.unit)
+
+
+def compute_region_stats(index, start, stop, unit):
+    """
+    Compute basic statistics for the values of an indexed spectrum between
+    two positions, without scanning the values of the region.
+    Parameters
+    ----------
+    index : `~specviz.utils.statistics.RegionStatsIndex`
+    start, stop : int
+    unit : `~astropy.units.Unit`
+        Unit of the indexed values.
+    """
+    return _stats_to_quantities(index.summary(start, stop), unit)
+
+
+def _stats_to_quantities(stats, unit):
+    return {'mean': stats['mean'] * unit,
+            'median': stats['median'] * unit,
+            'stddev': stats['stddev'] * unit,
+            'rms': stats['rms'] * unit,
+            'snr': u.Quantity(stats['mean'] / stats['rms']),  # snr(spectrum=spectrum),
+            'total': stats['total'] * unit,
+            'maxval': stats['maxval'] * unit,
+            'minval': stats['minval'] * unit}
 
 
 @plugin_bar("Statistics", icon=QIcon(":/icons/012-file.svg"))
@@ -74,13 +88,25 @@ class StatisticsWidget(QWidget, Plugin):
     stats computation functions and updating the stats widget. It only takes
     the owner workspace's current data item and selected region for stats
     computations. The stats box can be updated by calling the update_statistics
-    function.
+    function. Statistics are computed on a worker thread, and only those of
+    the latest update are displayed.
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._current_spectrum = None  # Current `Spectrum1D`
         self.stats = None  # dict with stats
 
+        # Prefix sum indices of recently used spectra, keyed by data item and
+        # data version, so that moving a region does not rescan the data.
+        # Only used from the statistics worker.
+        self._stats_indices = OrderedDict()
+
+        # Updates are often requested by several signals for one user action,
+        # so they are coalesced, and superseded results are never displayed
+        self._stats_runner = LatestTaskRunner(self)
+        self._stats_runner.result.connect(self._on_statistics_computed)
+        self._stats_runner.exception.connect(self._on_statistics_failed)
+
         self._init_ui()
 
         self.workspace.current_item_changed.connect(self.update_statistics)
@@ -203,10 +229,80 @@ class StatisticsWidget(QWidget, Plugin):
                                                  region.upper,
                                                  region.lower)
 
+    def _stats_index(self, key, spec):
+        """Retrieve, or build, the statistics index of a spectrum."""
+        index = self._stats_indices.get(key)
+
+        if index is None:
+            index = self._stats_indices[key] = RegionStatsIndex(
+                spec.spectral_axis.value, spec.flux.value)
+
+            if len(self._stats_indices) > STATS_INDEX_CACHE_SIZE:
+                self._stats_indices.popitem(last=False)
+        else:
+            self._stats_indices.move_to_end(key)
+
+        return index
+
     def clear_statistics(self):
+        # Drop any statistics still being computed for the previous selection
+        self._stats_runner.cancel()
         self._clear_stat_widgets()
         self.stats = None
 
+    def _compute_statistics(self, index_key, spec, bounds, target_name):
+        """
+        Compute the statistics of a spectrum, or of the part of it within a
+        region. Runs on the statistics worker thread, so it is only given
+        plain values rather than model items.
+
+        Parameters
+        ----------
+        index_key : tuple
+            Identifier and data version of the data item holding the
+            spectrum, under which its statistics index is cached.
+        spec : `~specutils.Spectrum1D`
+        bounds : tuple or None
+            Sorted region bounds in the units of the spectral axis, or `None`
+            for the whole spectrum.
+        target_name : str
+            Status message to display along with the statistics.
+
+        Returns
+        -------
+        tuple
+            The statistics, or `None` if they could not be computed, and the
+            status message to display.
+        """
+        # Without a region, a single pass over the spectrum is cheaper than
+        # building an index that may never be used
+        if bounds is None:
+            return compute_stats(spec), target_name
+
+        index = self._stats_index(index_key, spec)
+        start, stop = index.span(*bounds)
+
+        if stop == start:
+            return None, "Region out of bound."
+        if stop - start == 1:
+            return None, "Region over single value."
+
+        return (compute_region_stats(index, start, stop, spec.flux.unit),
+                target_name)
+
+    def _on_statistics_computed(self, result):
+        stats, message = result
+
+        self.stats = stats
+        self._update_stat_widgets(stats)
+        self.set_status(message)
+
+    def _on_statistics_failed(self, exception):
+        self.stats = None
+        self._clear_stat_widgets()
+        self.set_status("Statistics could not be computed: {}".format(
+            exception))
+
     def update_statistics(self):
         if self.workspace is None or self.plot_item is None:
             return self.clear_statistics()
@@ -225,33 +321,28 @@ class StatisticsWidget(QWidget, Plugin):
         if spec is None:
             self.set_status("No data selected.")
             return self.clear_statistics()
+
+        # Region bounds are located in the index by binary search, instead
+        # of extracting a sub-spectrum on every move
+        bounds = None
+
         if spectral_region is not None:
             if not check_unit_compatibility(spec, spectral_region):
                 self.set_status("Region units are not compatible with "
                                 "selected data's spectral axis units.")
                 return self.clear_statistics()
-            spectral_region = clip_region(spec, spectral_region)
-            if spectral_region is None:
-                self.set_status("Region out of bound.")
-                return self.clear_statistics()
-            try:
-                idx1, idx2 = spectral_region.to_pixel(spec)
-                if idx1 == idx2:
-                    self.set_status("Region over single value.")
-                    return self.clear_statistics()
-                spec = spectral_region.extract(spec)
-            except ValueError as e:
-                self.set_status("Region could not be extracted "
-                                "from target data.")
-                return self.clear_statistics()
+            bounds = sorted(
+                x.to_value(spec.spectral_axis.unit, equivalencies=u.spectral())
+                for x in (spectral_region.lower, spectral_region.upper))
         elif self._workspace_has_region():
             self.set_status("Region has no units")
             return self.clear_statistics()
 
-        # Compute stats and update widget:
-        self.stats = compute_stats(spec)
-        self._update_stat_widgets(self.stats)
-        self.set_status(self._get_target_name())
+        # Compute stats off the GUI thread, the widgets are updated once
+        # they arrive:
+        index_key = (self.data_item.identifier, self.data_item.version)
+        self._stats_runner.submit(self._compute_statistics, index_key,
+                                  spec, bounds, self._get_target_name())
 
     def update_signal_handler(self, *args, **kwargs):
         """
@@ -262,9 +262,6 @@ class UnitChangeDialog(QDialog, Plugin):
                     self.close()
                     return False
 
-            # Set new units
-            self.plot_widget.data_unit = data_unit_formatted
-
         else:
             # Converts the data_unit to something that can be used by PlotWidget
             self.current_data_unit = self.ui.comboBox_units.currentText()
@@ -278,9 +275,6 @@ class UnitChangeDialog(QDialog, Plugin):
                     self.close()
                     return False
 
-            # Set new units
-            self.plot_widget.data_unit = data_unit_formatted
-
         if self.ui.comboBox_spectral.currentText() == "Custom":
 
             # Try to enter the custom units
@@ -308,9 +302,6 @@ class UnitChangeDialog(QDialog, Plugin):
                     self.close()
                     return False
 
-            # Set new units
-            self.plot_widget.spectral_axis_unit = spectral_axis_unit_formatted
-
         else:
             # Converts the spectral_axis_unit to something that can be used by PlotWidget
             self.current_spectral_axis_unit = self.ui.comboBox_spectral.currentText()
@@ -324,8 +315,10 @@ class UnitChangeDialog(QDialog, Plugin):
                     self.close()
                     return False
 
-            # Set new units
-            self.plot_widget.spectral_axis_unit = spectral_axis_unit_formatted
+        # Set new units, converting the plotted data once for both axes
+        self.plot_widget.set_units(
+            data_unit=data_unit_formatted,
+            spectral_axis_unit=spectral_axis_unit_formatted)
 
         self.close()
         return True
@@ -0,0 +1,166 @@
+import os
+
+import astropy.units as u
+import numpy as np
+from astropy.nddata import StdDevUncertainty
+from astropy.tests.helper import assert_quantity_allclose
+from specutils import Spectrum1D
+
+from ..core.cache import ConvertedArrayStore, SpectrumCache
+
+
+def make_spectrum(size=100):
+    return Spectrum1D(flux=np.random.sample(size) * u.Jy,
+                      spectral_axis=np.arange(1, size + 1) * u.AA,
+                      uncertainty=StdDevUncertainty(np.ones(size) * 0.1))
+
+
+def test_cache_round_trip(tmpdir):
+    file_path = str(tmpdir.join("spectrum.fits"))
+    tmpdir.join("spectrum.fits").write("data")
+
+    cache = SpectrumCache(path=str(tmpdir.join("cache")))
+    spec = make_spectrum()
+
+    assert cache.get(file_path, 'tabular-fits') is None
+
+    cache.put(file_path, 'tabular-fits', spec)
+    cached_spec = cache.get(file_path, 'tabular-fits')
+
+    assert_quantity_allclose(cached_spec.flux, spec.flux)
+    assert_quantity_allclose(cached_spec.spectral_axis, spec.spectral_axis)
+    assert isinstance(cached_spec.uncertainty, StdDevUncertainty)
+    np.testing.assert_allclose(cached_spec.uncertainty.array,
+                               spec.uncertainty.array)
+
+    # Entries are specific to the loader used
+    assert cache.get(file_path, 'wcs1d-fits') is None
+
+    # Modifying the file invalidates its entry
+    tmpdir.join("spectrum.fits").write("modified data")
+
+    assert cache.get(file_path, 'tabular-fits') is None
+
+
+def test_cache_round_trip_meta_and_mask(tmpdir):
+    file_path = str(tmpdir.join("spectrum.fits"))
+    tmpdir.join("spectrum.fits").write("data")
+
+    cache = SpectrumCache(path=str(tmpdir.join("cache")))
+    mask = np.zeros(100, dtype=bool)
+    mask[10:20] = True
+    spec = Spectrum1D(flux=np.random.sample(100) * u.Jy,
+                      spectral_axis=np.arange(1, 101) * u.AA,
+                      mask=mask,
+                      meta={'header': {'OBJECT': 'M31', 'EXPTIME': 1200.0}})
+
+    cache.put(file_path, 'tabular-fits', spec)
+    cached_spec = cache.get(file_path, 'tabular-fits')
+
+    assert cached_spec.meta == spec.meta
+    np.testing.assert_array_equal(cached_spec.mask, mask)
+    assert cached_spec.uncertainty is None
+
+
+def test_cache_skips_unpicklable_meta(tmpdir):
+    file_path = str(tmpdir.join("spectrum.fits"))
+    tmpdir.join("spectrum.fits").write("data")
+
+    cache = SpectrumCache(path=str(tmpdir.join("cache")))
+    spec = Spectrum1D(flux=np.random.sample(10) * u.Jy,
+                      spectral_axis=np.arange(1, 11) * u.AA,
+                      meta={'callback': lambda: None})
+
+    cache.put(file_path, 'tabular-fits', spec)
+
+    assert not cache.contains(file_path, 'tabular-fits')
+
+
+def test_cache_eviction(tmpdir):
+    cache = SpectrumCache(path=str(tmpdir.join("cache")))
+    file_paths = []
+
+    for i in range(3):
+        file_path = str(tmpdir.join("spectrum{}.fits".format(i)))
+        tmpdir.join("spectrum{}.fits".format(i)).write(str(i))
+        file_paths.append(file_path)
+
+        cache.put(file_path, 'tabular-fits', make_spectrum())
+
+        # Ensure entries have distinct last used times
+        entry_path = os.path.join(cache.path,
+                                  cache.key(file_path, 'tabular-fits'))
+        os.utime(entry_path, (i, i))
+
+    # Using the first entry makes the second the least recently used
+    cache.get(file_paths[0], 'tabular-fits')
+
+    cache.evict(max_size=cache.size - 1)
+
+    assert cache.get(file_paths[1], 'tabular-fits') is None
+    assert cache.get(file_paths[0], 'tabular-fits') is not None
+    assert cache.get(file_paths[2], 'tabular-fits') is not None
+
+    cache.clear()
+
+    assert cache.size == 0
+
+
+def test_cache_scans_only_when_needed(tmpdir, monkeypatch):
+    cache = SpectrumCache(path=str(tmpdir.join("cache")))
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, '_entries',
+                        lambda: scans.append(1) or entries())
+
+    for i in range(10):
+        tmpdir.join("spectrum{}.fits".format(i)).write(str(i))
+        cache.put(str(tmpdir.join("spectrum{}.fits".format(i))),
+                  'tabular-fits', make_spectrum())
+
+    # Only the first store measures the cache, later ones add to an estimate
+    assert len(scans) == 1
+
+    # Exceeding the bound scans the cache and evicts entries
+    cache._max_size = cache.size // 2
+    del scans[:]
+
+    tmpdir.join("spectrum10.fits").write("10")
+    cache.put(str(tmpdir.join("spectrum10.fits")), 'tabular-fits',
+              make_spectrum())
+
+    assert len(scans) == 1
+    assert cache.size <= cache.max_size
+
+
+def test_converted_array_store():
+    store = ConvertedArrayStore()
+    computed = []
+
+    def compute():
+        computed.append(1)
+        return np.arange(10.0)
+
+    first = store.acquire(('a', 1), compute)
+    second = store.acquire(('a', 1), compute)
+
+    # The entry is computed once, shared, and read-only
+    assert first is second
+    assert len(computed) == 1
+    assert not first.flags.writeable
+    assert store.refcount(('a', 1)) == 2
+    assert store.nbytes == first.nbytes
+
+    store.release(('a', 1))
+
+    assert ('a', 1) in store
+
+    store.release(('a', 1))
+
+    assert ('a', 1) not in store
+
+    store.acquire(('a', 2), compute)
+    store.acquire(('b', 2), compute)
+    store.discard('a')
+
+    assert len(store) == 1 and ('b', 2) in store
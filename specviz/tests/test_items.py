@@ -0,0 +1,126 @@
+import astropy.units as u
+import numpy as np
+from astropy.io import registry as io_registry
+from specutils import Spectrum1D
+
+from ..core import cache
+from ..core.cache import ConvertedArrayStore
+from ..core.items import DataItem, PlotDataItem
+from ..core.loaders import SpectrumHandle, read_spectrum_lazy
+
+
+def read_test_spectrum(file_path, **kwargs):
+    mask = np.zeros(10, dtype=bool)
+    mask[3] = True
+
+    return Spectrum1D(flux=np.arange(10.0) * u.Jy,
+                      spectral_axis=np.arange(1, 11) * u.AA,
+                      mask=mask,
+                      meta={'header': {'OBJECT': 'M31',
+                                       'FILENAME': file_path}})
+
+
+def test_data_item_handle_keeps_meta(tmpdir, monkeypatch):
+    monkeypatch.setattr(cache, '_spectrum_cache', cache.SpectrumCache(
+        path=str(tmpdir.join("cache"))))
+    io_registry.register_reader('test-meta', Spectrum1D, read_test_spectrum)
+
+    try:
+        file_path = str(tmpdir.join("spectrum.txt"))
+        tmpdir.join("spectrum.txt").write("data")
+
+        handle = read_spectrum_lazy(file_path, 'test-meta')
+        assert isinstance(handle, SpectrumHandle)
+
+        data_item = DataItem("Data", identifier=1, data=handle)
+        parsed_spec = read_test_spectrum(file_path)
+
+        # Materialized from the cache entry on the very first load
+        assert data_item.spectrum.meta == parsed_spec.meta
+        np.testing.assert_array_equal(data_item.spectrum.mask,
+                                      parsed_spec.mask)
+    finally:
+        io_registry.unregister_reader('test-meta', Spectrum1D)
+
+
+def test_plot_data_item_conversion_cache(qapp):
+    spec = Spectrum1D(flux=np.random.sample(100) * u.Jy,
+                      spectral_axis=np.linspace(4000, 5000, 100) * u.AA)
+    data_item = DataItem("Data", identifier=1, data=spec)
+    plot_data_item = PlotDataItem(data_item)
+
+    plot_data_item.data_unit = 'erg / (s cm2 Angstrom)'
+    plot_data_item.spectral_axis_unit = 'Hz'
+
+    expected_flux = spec.flux.to('erg / (s cm2 Angstrom)',
+                                 equivalencies=u.spectral_density(
+                                     spec.spectral_axis)).value
+
+    assert np.allclose(plot_data_item.flux, expected_flux)
+    assert np.allclose(plot_data_item.spectral_axis,
+                       spec.spectral_axis.to('Hz', u.spectral()).value)
+
+    # Repeated reads are served from the cache
+    assert plot_data_item.flux is plot_data_item.flux
+
+    # Replacing the data invalidates the cached conversions
+    data_item.set_data(Spectrum1D(flux=np.ones(10) * u.Jy,
+                                  spectral_axis=np.arange(1, 11) * u.AA))
+
+    assert plot_data_item.flux.shape == (10,)
+    assert plot_data_item.spectral_axis.shape == (10,)
+
+
+def test_plot_data_item_releases_replaced_conversions(qapp):
+    store = ConvertedArrayStore()
+    spec = Spectrum1D(flux=np.random.sample(100) * u.Jy,
+                      spectral_axis=np.linspace(4000, 5000, 100) * u.AA)
+    data_item = DataItem("Data", identifier=1, data=spec)
+    plot_data_item = PlotDataItem(data_item, store=store)
+
+    plot_data_item.flux, plot_data_item.spectral_axis
+
+    # Conversions of the replaced data are released, not kept in the cache
+    data_item.set_data(Spectrum1D(flux=np.ones(10) * u.Jy,
+                                  spectral_axis=np.arange(1, 11) * u.AA))
+    plot_data_item.flux, plot_data_item.spectral_axis
+
+    assert len(store) == 2
+    assert store.nbytes == sum(
+        x.nbytes for x in (plot_data_item.flux, plot_data_item.spectral_axis))
+
+
+def test_plot_data_item_view_clipping(qapp):
+    size = 100000
+    spectral_axis = np.linspace(4000, 5000, size)
+    flux = np.random.sample(size)
+    in_view = (spectral_axis >= 4500) & (spectral_axis <= 4501)
+
+    # Ascending and descending spectral axes
+    for order in [np.arange(size), np.arange(size)[::-1]]:
+        spec = Spectrum1D(flux=flux[order] * u.Jy,
+                          spectral_axis=spectral_axis[order] * u.AA)
+        plot_data_item = PlotDataItem(DataItem("Data", identifier=1,
+                                               data=spec))
+
+        # Only the values in and around the view are drawn
+        plot_data_item.set_view((4500, 4501), 1000)
+        x, y = plot_data_item.getData()
+
+        assert in_view.sum() <= x.size < size / 100
+        assert np.all(np.isin(spectral_axis[in_view], x))
+
+
+def test_plot_data_item_gaps(qapp):
+    flux = np.arange(10, dtype=float)
+    flux[[3, 4, 8]] = np.nan
+    spec = Spectrum1D(flux=flux * u.Jy,
+                      spectral_axis=np.arange(1, 11) * u.AA)
+    plot_data_item = PlotDataItem(DataItem("Data", identifier=1, data=spec))
+
+    x, y = plot_data_item.getData()
+
+    # Non-finite values are not drawn, and break the line where they were
+    assert np.array_equal(x, [1, 2, 3, 6, 7, 8, 10])
+    assert np.array_equal(plot_data_item.opts['connect'][:-1],
+                          [True, True, False, True, True, False])
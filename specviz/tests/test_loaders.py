@@ -0,0 +1,149 @@
+import os
+
+import astropy.units as u
+import numpy as np
+from astropy.io import registry as io_registry
+from specutils import Spectrum1D
+
+from ..core import cache, loaders
+from ..core.loaders import (LoaderTable, SpectrumHandle, expand_paths,
+                            file_signature, read_spectrum_components,
+                            spectrum_from_components)
+
+
+def test_expand_paths(tmpdir):
+    for name in ['a.fits', 'b.fits', 'c.txt', '.hidden']:
+        tmpdir.join(name).write("")
+
+    tmpdir.mkdir("nested").join("d.fits").write("")
+
+    dir_path = str(tmpdir)
+
+    # Directories expand to the files they directly contain
+    assert expand_paths(dir_path) == [os.path.join(dir_path, x)
+                                      for x in ['a.fits', 'b.fits', 'c.txt']]
+
+    # Glob patterns are expanded and duplicate entries are removed
+    assert expand_paths([os.path.join(dir_path, '*.fits'),
+                         os.path.join(dir_path, 'a.fits')]) == [
+        os.path.join(dir_path, 'a.fits'), os.path.join(dir_path, 'b.fits')]
+
+    # Plain paths are passed through untouched
+    assert expand_paths(['missing.fits']) == ['missing.fits']
+
+
+def test_file_signature(tmpdir):
+    header = "SIMPLE  =                    T{}".format(" " * 50)
+    end = "END".ljust(80)
+
+    def write_fits(name, naxis, instrument, length):
+        cards = [header,
+                 "NAXIS   = {:>20}".format(naxis).ljust(80),
+                 "NAXIS1  = {:>20}".format(length).ljust(80),
+                 "INSTRUME= '{}'".format(instrument).ljust(80),
+                 end]
+        tmpdir.join(name).write("".join(cards).ljust(2880))
+        return str(tmpdir.join(name))
+
+    # Files differing only in data length share a signature
+    assert file_signature(write_fits('a.fits', 1, 'COS', 100)) == \
+        file_signature(write_fits('b.fits', 1, 'COS', 200))
+
+    # Discriminating header values and extensions change the signature
+    assert file_signature(write_fits('c.fits', 1, 'COS', 100)) != \
+        file_signature(write_fits('d.fits', 1, 'STIS', 100))
+    assert file_signature(write_fits('e.fits', 1, 'COS', 100)) != \
+        file_signature(write_fits('e.fit', 1, 'COS', 100))
+
+    # Text files are fingerprinted by their first line, ignoring numbers
+    tmpdir.join('a.txt').write("wave flux 1.5e3\n1 2\n")
+    tmpdir.join('b.txt').write("wave flux 2\n3 4\n5 6\n")
+    tmpdir.join('c.txt').write("lambda flux\n")
+
+    assert file_signature(str(tmpdir.join('a.txt'))) == \
+        file_signature(str(tmpdir.join('b.txt')))
+    assert file_signature(str(tmpdir.join('a.txt'))) != \
+        file_signature(str(tmpdir.join('c.txt')))
+
+
+def test_loader_table(tmpdir):
+    path = str(tmpdir.join("loaders.json"))
+
+    table = LoaderTable(path)
+    assert table.get("abc") is None
+
+    table.set("abc", "tabular-fits")
+    assert table.get("abc") == "tabular-fits"
+
+    # Entries written by other tables sharing the file are preserved
+    other_table = LoaderTable(path)
+    other_table.set("def", "ASCII")
+
+    table.set("ghi", "wcs1d-fits")
+
+    assert LoaderTable(path).get("abc") == "tabular-fits"
+    assert LoaderTable(path).get("def") == "ASCII"
+    assert LoaderTable(path).get("ghi") == "wcs1d-fits"
+
+
+def test_handle_units_lookup_remembered(monkeypatch):
+    lookups = []
+    handle = SpectrumHandle('/data/spec.fits', 'wcs1d-fits')
+    monkeypatch.setattr(handle, '_lookup_meta', lambda: lookups.append(1))
+
+    # A miss is remembered, so repeated checks do not go back to the disk
+    assert not handle.units_known
+    assert not handle.units_known
+    assert len(lookups) == 1
+
+    # Files whose format has not been detected are not read to check units
+    auto_handle = SpectrumHandle('/data/spec.fits', 'auto')
+    monkeypatch.setattr(auto_handle, '_lookup_meta',
+                        lambda: lookups.append(1))
+
+    assert not auto_handle.units_known
+    assert len(lookups) == 1
+
+    # Loading the spectrum makes its units known
+    monkeypatch.setattr(loaders, 'read_spectrum', lambda *args: Spectrum1D(
+        flux=np.ones(3) * u.Jy, spectral_axis=np.arange(1, 4) * u.AA))
+    handle.load()
+
+    assert handle.units_known
+    assert handle.flux_unit == u.Jy
+    assert handle.spectral_axis_unit == u.AA
+
+
+def test_spectrum_components(tmpdir, monkeypatch):
+    # Components are only sent for spectra the cache does not hold
+    spectrum_cache = cache.SpectrumCache(path=str(tmpdir.join("cache")))
+    monkeypatch.setattr(spectrum_cache, 'put', lambda *args: None)
+    monkeypatch.setattr(cache, '_spectrum_cache', spectrum_cache)
+
+    mask = np.array([False, True, False])
+    meta = {'header': {'OBJECT': 'M31'}}
+
+    def read_test_spectrum(file_path, **kwargs):
+        return Spectrum1D(flux=np.ones(3) * u.Jy,
+                          spectral_axis=np.arange(1, 4) * u.AA,
+                          mask=mask, meta=meta)
+
+    io_registry.register_reader('test-components', Spectrum1D,
+                                read_test_spectrum)
+
+    try:
+        file_path = str(tmpdir.join("spectrum.txt"))
+        tmpdir.join("spectrum.txt").write("data")
+
+        spec = spectrum_from_components(
+            read_spectrum_components(file_path, 'test-components'))
+
+        assert spec.meta == meta
+        np.testing.assert_array_equal(spec.mask, mask)
+
+        # Meta data that cannot be pickled is left to the calling process
+        meta['callback'] = lambda: None
+
+        assert read_spectrum_components(file_path, 'test-components') is None
+    finally:
+        io_registry.unregister_reader('test-components', Spectrum1D)
@@ -0,0 +1,140 @@
+import numpy as np
+import pytest
+from astropy.table import Table
+from qtpy.QtCore import QSortFilterProxyModel, Qt
+
+from ..core.loaders import SpectrumHandle
+from ..core.models import (FETCH_BATCH_SIZE, DataListModel, PlotProxyModel,
+                           TableModel)
+
+
+def test_catalog_fetch_more():
+    model = DataListModel()
+    initial_rows = model.rowCount()
+
+    file_paths = ['/data/spec-{:05d}.fits'.format(i)
+                  for i in range(FETCH_BATCH_SIZE * 2 + 10)]
+
+    assert model.add_catalog(file_paths, 'wcs1d-fits') == len(file_paths)
+
+    # Nothing is materialized until a view asks for more rows
+    assert model.rowCount() == initial_rows
+    assert model.pending_count == len(file_paths)
+    assert model.canFetchMore()
+
+    model.fetchMore()
+
+    assert model.rowCount() == initial_rows + FETCH_BATCH_SIZE
+    assert model.pending_count == len(file_paths) - FETCH_BATCH_SIZE
+
+    item = model.item(initial_rows)
+
+    assert item.name == 'spec-00000'
+    assert isinstance(item.data(item.DataRole), SpectrumHandle)
+    assert not item.is_materialized
+    assert model.item_from_id(item.identifier) is item
+
+    while model.canFetchMore():
+        model.fetchMore()
+
+    assert model.rowCount() == initial_rows + len(file_paths)
+    assert model.pending_count == 0
+    assert model.item(model.rowCount() - 1).name == 'spec-00521'
+
+
+def test_proxy_items_created_on_demand():
+    model = DataListModel()
+    proxy_model = PlotProxyModel(model)
+
+    # Displaying rows does not create plot data items
+    for row in range(proxy_model.rowCount()):
+        index = proxy_model.index(row, 0)
+
+        assert proxy_model.data(index) == model.item(row).name
+        assert proxy_model.data(index, Qt.CheckStateRole) != Qt.Checked
+
+    assert len(proxy_model.items) == 0
+
+    identifier = model.item(0).identifier
+    item = proxy_model.item_from_id(identifier)
+
+    assert item is proxy_model.item_from_index(proxy_model.index(0, 0))
+    assert proxy_model.item_from_index(proxy_model.index(1, 0),
+                                       create=False) is None
+
+    # Plot data items are released along with their rows
+    model.remove_data(identifier)
+
+    assert len(proxy_model.items) == 0
+
+
+def test_proxy_items_share_converted_arrays(qapp):
+    model = DataListModel()
+    proxy_models = [PlotProxyModel(model) for _ in range(3)]
+    identifier = model.item(0).identifier
+    items = [x.item_from_id(identifier) for x in proxy_models]
+
+    # Plot windows showing the same data in the same units share its arrays
+    assert items[0].flux is items[1].flux is items[2].flux
+    assert items[0].spectral_axis is items[1].spectral_axis
+
+    # Arrays are recomputed, rather than shared, in other units
+    items[2].set_units('mJy', 'nm')
+
+    assert items[2].flux is not items[0].flux
+
+    # Arrays are dropped once no window uses them
+    for proxy_model in proxy_models:
+        proxy_model.release()
+
+    assert len(model.array_store) == 0
+
+
+def test_display_precision(qapp):
+    model = DataListModel()
+    proxy_model = PlotProxyModel(model)
+    data_item = model.item(0)
+    item = proxy_model.item_from_id(data_item.identifier)
+
+    assert item.flux.dtype == np.float64
+
+    # Existing and new plot data items display single precision copies
+    model.display_precision = 'single'
+    new_item = PlotProxyModel(model).item_from_id(data_item.identifier)
+
+    for plot_data_item in (item, new_item):
+        assert plot_data_item.flux.dtype == np.float32
+        assert plot_data_item.spectral_axis.dtype == np.float32
+        assert plot_data_item.getData()[1].dtype == np.float32
+
+    np.testing.assert_allclose(item.flux, data_item.flux.value, rtol=1e-6)
+
+    # The data item keeps the full precision spectrum
+    assert data_item.flux.dtype == np.float64
+
+    with pytest.raises(ValueError):
+        model.display_precision = 'half'
+
+
+def test_table_model(qapp):
+    table = Table({'data': ["a", "b", "c"], 'mean': [10.0, 2.0, np.nan]})
+    table['mean'].unit = 'Jy'
+    model = TableModel(table)
+
+    assert model.rowCount() == 3
+    assert model.columnCount() == 2
+    assert model.headerData(1, Qt.Horizontal) == "mean (Jy)"
+    assert model.data(model.index(0, 1)) == "10.000"
+    assert model.data(model.index(1, 0)) == "b"
+
+    # Rows sort by value rather than by their formatted text
+    sort_model = QSortFilterProxyModel()
+    sort_model.setSortRole(TableModel.SortRole)
+    sort_model.setSourceModel(model)
+    sort_model.sort(1)
+
+    assert [sort_model.index(row, 0).data() for row in range(2)] == ["b", "a"]
+
+    model.table = None
+
+    assert model.rowCount() == 0
@@ -0,0 +1,169 @@
+import astropy.units as u
+import numpy as np
+from specutils import Spectrum1D
+
+from ..core.models import DataListModel, PlotProxyModel
+from ..widgets.plotting import PlotWidget
+
+
+def test_set_units(qtbot):
+    model = DataListModel()
+    plot_widget = PlotWidget(model=model)
+    qtbot.addWidget(plot_widget)
+
+    specs = [Spectrum1D(flux=np.random.sample(100) * u.Jy,
+                        spectral_axis=np.linspace(4000, 5000, 100) * u.AA)
+             for _ in range(3)]
+    data_items = model.add_data_many(specs, ["a", "b", "c"])
+
+    with plot_widget.batch_update():
+        for data_item in data_items:
+            plot_widget.add_plot(
+                item=plot_widget.proxy_model.item_from_id(
+                    data_item.identifier), initialize=True)
+
+    auto_ranges = []
+    plot_widget.auto_range = lambda *args, **kwargs: auto_ranges.append(1)
+
+    plot_widget.set_units(data_unit='erg / (s cm2 Angstrom)',
+                          spectral_axis_unit='Hz')
+
+    assert plot_widget.data_unit == 'erg / (s cm2 Angstrom)'
+    assert plot_widget.spectral_axis_unit == 'Hz'
+    assert len(auto_ranges) == 1
+
+    for spec, data_item in zip(specs, data_items):
+        x, y = plot_widget.proxy_model.item_from_id(
+            data_item.identifier).getData()
+
+        np.testing.assert_allclose(
+            x, spec.spectral_axis.to_value(u.Hz, u.spectral()))
+        np.testing.assert_allclose(y, spec.flux.to_value(
+            'erg / (s cm2 Angstrom)',
+            equivalencies=u.spectral_density(spec.spectral_axis)))
+
+
+def test_unit_compatibility_shared_model(qtbot):
+    model = DataListModel()
+    plot_widget = PlotWidget(model=model)
+    qtbot.addWidget(plot_widget)
+
+    # Another plot window showing the same data
+    other_proxy_model = PlotProxyModel(model)
+    repainted_rows = set()
+    other_proxy_model.dataChanged.connect(
+        lambda first, last, *args: repainted_rows.update(
+            range(first.row(), last.row() + 1)))
+
+    clicks = []
+    model.itemChanged.connect(
+        lambda item: clicks.append(item) if not model.is_updating_flags
+        else None)
+
+    plot_widget.initialize_plot(data_unit='Jy', spectral_axis_unit='Angstrom')
+    plot_widget.check_plot_compatibility()
+
+    # The erg data items are disabled, and every window repaints them
+    assert [item.isEnabled() for item in model.items] == [True, False, False]
+    assert repainted_rows == {1, 2}
+
+    # Disabling items is not mistaken for clicks of their checkboxes
+    assert clicks == []
+
+
+def test_auto_range(qtbot):
+    model = DataListModel()
+    plot_widget = PlotWidget(model=model)
+    qtbot.addWidget(plot_widget)
+
+    specs = [Spectrum1D(flux=np.array([1, np.nan, 3]) * u.Jy,
+                        spectral_axis=np.array([10, 20, 30]) * u.AA),
+             Spectrum1D(flux=np.array([-2, 0, 2]) * u.Jy,
+                        spectral_axis=np.array([25, 35, 45]) * u.AA)]
+    data_items = model.add_data_many(specs, ["a", "b"])
+    plot_data_items = [
+        plot_widget.proxy_model.item_from_id(data_item.identifier)
+        for data_item in data_items]
+
+    for plot_data_item in plot_data_items:
+        plot_widget.add_plot(item=plot_data_item, initialize=True)
+
+    assert plot_widget.data_bounds == [[10, 45], [-2, 3]]
+
+    # The plot fits the data
+    plot_widget.auto_range()
+
+    (x_min, x_max), (y_min, y_max) = plot_widget.viewRange()
+
+    assert x_min <= 10 and x_max >= 45 and x_max - x_min < 40
+    assert y_min <= -2 and y_max >= 3 and y_max - y_min < 6
+
+    plot_widget.remove_plot(item=plot_data_items[1])
+
+    assert plot_widget.data_bounds == [[10, 30], [1, 3]]
+
+
+def test_auto_range_remove_then_add(qtbot):
+    model = DataListModel()
+    plot_widget = PlotWidget(model=model)
+    qtbot.addWidget(plot_widget)
+
+    specs = [Spectrum1D(flux=np.array([1, 2, 3]) * u.Jy,
+                        spectral_axis=np.array([10, 20, 30]) * u.AA),
+             Spectrum1D(flux=np.array([-2, 0, 2]) * u.Jy,
+                        spectral_axis=np.array([25, 35, 45]) * u.AA),
+             Spectrum1D(flux=np.array([4, 5, 6]) * u.Jy,
+                        spectral_axis=np.array([50, 60, 70]) * u.AA)]
+    data_items = model.add_data_many(specs, ["a", "b", "c"])
+    plot_data_items = [
+        plot_widget.proxy_model.item_from_id(data_item.identifier)
+        for data_item in data_items]
+
+    plot_widget.add_plot(item=plot_data_items[0], initialize=True)
+    plot_widget.add_plot(item=plot_data_items[1])
+    plot_widget.remove_plot(item=plot_data_items[1])
+    plot_widget.add_plot(item=plot_data_items[2])
+
+    # Adding an item after the bounds were invalidated still includes every
+    # plotted item, not just the one added
+    assert plot_widget.data_bounds == [[10, 70], [1, 6]]
+
+
+def test_roi_moved_throttled(qtbot):
+    plot_widget = PlotWidget(model=DataListModel())
+    qtbot.addWidget(plot_widget)
+    plot_widget.initialize_plot(data_unit='Jy', spectral_axis_unit='Angstrom')
+
+    moves = []
+    plot_widget.roi_moved.connect(moves.append)
+    plot_widget._on_add_linear_region(min_bound=0.2, max_bound=0.4)
+
+    # Dragging the region only reports its latest position
+    for step in range(50):
+        plot_widget.selected_region.setRegion((0.2 + step * 0.01, 0.6))
+
+    qtbot.waitUntil(lambda: len(moves) > 0, timeout=1000)
+    qtbot.wait(plot_widget.roi_move_interval * 2)
+
+    assert len(moves) == 1
+    np.testing.assert_allclose(moves[0].to_value(u.AA), [0.6, 0.69])
+
+
+def test_regions_bounds(qtbot):
+    plot_widget = PlotWidget(model=DataListModel())
+    qtbot.addWidget(plot_widget)
+    plot_widget.initialize_plot(data_unit='Jy', spectral_axis_unit='Angstrom')
+
+    plot_widget._on_add_linear_region(min_bound=1, max_bound=2)
+    plot_widget._on_add_linear_region(min_bound=5, max_bound=8)
+
+    assert len(plot_widget.regions) == 2
+
+    bounds = plot_widget.regions_bounds
+
+    np.testing.assert_allclose(bounds[0].to_value(u.AA), [1, 2])
+    np.testing.assert_allclose(bounds[1].to_value(u.AA), [5, 8])
+
+    plot_widget._on_remove_linear_region()
+
+    assert len(plot_widget.regions) == 1
@@ -0,0 +1,53 @@
+import threading
+
+from ..core.threads import LatestTaskRunner
+
+
+def test_latest_task_runner(qtbot):
+    runner = LatestTaskRunner()
+    results = []
+    runner.result.connect(results.append)
+
+    calls = []
+    release = threading.Event()
+
+    def task(value):
+        calls.append(value)
+        release.wait(5)
+        return value
+
+    runner.submit(task, 0)
+    qtbot.waitUntil(lambda: calls == [0], timeout=1000)
+
+    # Requests made while a task is running are coalesced, and the result of
+    # the superseded task is dropped
+    for value in range(1, 10):
+        runner.submit(task, value)
+
+    release.set()
+    qtbot.waitUntil(lambda: not runner.busy, timeout=1000)
+
+    assert calls == [0, 9]
+    assert results == [9]
+
+    # Cancelled requests deliver nothing
+    runner.submit(task, 10)
+    runner.cancel()
+    qtbot.wait(50)
+
+    assert results == [9]
+    assert not runner.busy
+
+
+def test_latest_task_runner_exception(qtbot):
+    runner = LatestTaskRunner()
+    exceptions = []
+    runner.exception.connect(exceptions.append)
+
+    def task():
+        raise ValueError("Bad region")
+
+    runner.submit(task)
+    qtbot.waitUntil(lambda: len(exceptions) == 1, timeout=1000)
+
+    assert isinstance(exceptions[0], ValueError)
@@ -3,4 +3,5 @@ import os
 
 UI_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "ui"))
 DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+SETTINGS_PATH = os.path.expanduser("~/.specviz")
 
@@ -0,0 +1,132 @@
+"""
+Level-of-detail decimation of long spectra for display.
+
+Drawing millions of points is far slower than the display can show, since
+only a few thousand pixels are visible. An :class:`EnvelopePyramid` stores, for
+successively coarser bins of a spectrum, the positions of the minimum and
+maximum value in each bin. Drawing the minimum and maximum of each bin at a
+level whose bins are about a pixel wide gives the same picture as drawing
+every point, including narrow peaks, with a small fraction of the points.
+"""
+import numpy as np
+
+__all__ = ['EnvelopePyramid']
+
+
+class EnvelopePyramid:
+    """
+    Min/max envelope pyramid of an array of values. Level ``l`` holds, for
+    each bin of ``2 ** l`` consecutive values, the index of its minimum and
+    maximum value. Level 0 stands for the values themselves. NaN values are
+    ignored unless a bin holds nothing else.
+
+    Parameters
+    ----------
+    values : :class:`~numpy.ndarray`
+        The values, e.g. the flux of a spectrum.
+    min_bins : int, optional
+        Levels stop being built once they have fewer bins than this.
+    """
+    def __init__(self, values, min_bins=256):
+        values = np.asarray(values)
+
+        self._size = values.size
+        self._levels = []
+
+        index_type = np.int32 if self._size < 2 ** 31 else np.int64
+        min_indices = max_indices = np.arange(self._size, dtype=index_type)
+
+        while min_indices.size >= 2 * min_bins:
+            min_indices = self._reduce(values, min_indices, np.less)
+            max_indices = self._reduce(values, max_indices, np.greater)
+
+            self._levels.append((min_indices, max_indices))
+
+    @staticmethod
+    def _reduce(values, indices, compare):
+        """
+        Combine neighbouring pairs of bins, keeping the index of the value
+        that compares favourably or, if one of the pair is NaN, the other.
+        """
+        left = indices[0::2]
+        right = indices[1::2]
+
+        # An odd trailing bin is carried through on its own
+        if right.size < left.size:
+            right = np.append(right, left[-1])
+
+        left_values = values[left]
+        right_values = values[right]
+
+        take_right = compare(right_values, left_values) | \
+            np.isnan(left_values)
+
+        return np.where(take_right, right, left)
+
+    def __len__(self):
+        """The number of levels, including the full resolution level 0."""
+        return len(self._levels) + 1
+
+    @property
+    def size(self):
+        """The number of values the pyramid was built from."""
+        return self._size
+
+    def level_for(self, count, pixels):
+        """
+        Choose the coarsest level that still resolves the values at the given
+        pixel width, i.e. whose bins are no wider than a pixel.
+
+        Parameters
+        ----------
+        count : int
+            The number of values spanning the displayed range.
+        pixels : int
+            The width of the displayed range, in pixels.
+
+        Returns
+        -------
+        int
+            The level to display.
+        """
+        if count <= 2 * pixels:
+            return 0
+
+        level = int(np.floor(np.log2(count / max(pixels, 1))))
+
+        return min(max(level, 0), len(self._levels))
+
+    def indices(self, level, start=0, stop=None):
+        """
+        Indices of the values to display at a level, in increasing order. Each
+        bin contributes its minimum and maximum, in the order they occur.
+
+        Parameters
+        ----------
+        level : int
+            The level to display.
+        start, stop : int, optional
+            Range of values to display. Every bin overlapping the range is
+            included. Defaults to all values.
+
+        Returns
+        -------
+        :class:`~numpy.ndarray` or None
+            The indices, or `None` for level 0, where every value is shown.
+        """
+        if level <= 0:
+            return
+
+        stop = self._size if stop is None else stop
+        first_bin = start >> level
+        last_bin = max(stop - 1, start) >> level
+
+        min_indices, max_indices = self._levels[level - 1]
+        min_indices = min_indices[first_bin:last_bin + 1]
+        max_indices = max_indices[first_bin:last_bin + 1]
+
+        indices = np.empty(2 * min_indices.size, dtype=min_indices.dtype)
+        np.minimum(min_indices, max_indices, out=indices[0::2])
+        np.maximum(min_indices, max_indices, out=indices[1::2])
+
+        return indices
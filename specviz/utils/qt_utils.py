@@ -1,3 +1,7 @@
+from collections import OrderedDict
+
+import qtawesome as qta
+from qtpy.QtCore import QObject, QTimer, Signal
 from qtpy.QtWidgets import QMenu, QAction
 
 
@@ -20,3 +24,149 @@ def dict_to_menu(parent, menu_dict, menu_widget=None):
             act.triggered.connect(v)
             menu_widget.addAction(act)
     return menu_widget
+
+
+class IconCache:
+    """
+    Bounded cache of `qtawesome` icons keyed by icon name and color. Building
+    an icon renders a font glyph, which is too slow to repeat for every row
+    on every repaint of a long list. When the cache is full, the least
+    recently used icon is dropped.
+
+    Parameters
+    ----------
+    max_size : int, optional
+        Maximum number of icons held.
+    """
+    def __init__(self, max_size=128):
+        self._max_size = max_size
+        self._icons = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._icons)
+
+    @property
+    def hit_rate(self):
+        """Fraction of requests served from the cache."""
+        requests = self.hits + self.misses
+
+        return self.hits / requests if requests > 0 else 0.0
+
+    def icon(self, name, color):
+        """
+        Retrieve the icon with the given name, drawn in the given color.
+
+        Parameters
+        ----------
+        name : str
+            The `qtawesome` icon name, e.g. ``'fa.eye'``.
+        color : str
+            Color of the icon.
+
+        Returns
+        -------
+        : :class:`~qtpy.QtGui.QIcon`
+            The icon.
+        """
+        key = (name, color)
+        icon = self._icons.get(key)
+
+        if icon is not None:
+            self.hits += 1
+            self._icons.move_to_end(key)
+
+            return icon
+
+        self.misses += 1
+        icon = self._icons[key] = qta.icon(name, color=color)
+
+        if len(self._icons) > self._max_size:
+            self._icons.popitem(last=False)
+
+        return icon
+
+    def clear(self):
+        """Drop every cached icon and reset the counters."""
+        self._icons.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class SignalThrottle(QObject):
+    """
+    Rate limits a stream of events. Values pushed while an interval is
+    running are coalesced, and once the interval elapses only the most
+    recent one is delivered through :attr:`triggered`. This keeps costly
+    listeners, e.g. statistics recomputed as a region is dragged, from
+    running on every mouse move.
+
+    Parameters
+    ----------
+    interval : int, optional
+        Minimum time between deliveries, in milliseconds.
+    parent : :class:`~qtpy.QtCore.QObject`, optional
+        Parent of the throttle.
+
+    Signals
+    -------
+    triggered : object
+        Fired with the most recently pushed value.
+    """
+    triggered = Signal(object)
+
+    def __init__(self, interval=33, parent=None):
+        super(SignalThrottle, self).__init__(parent)
+
+        self._value = None
+        self._pending = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+
+    @property
+    def interval(self):
+        """Minimum time between deliveries, in milliseconds."""
+        return self._timer.interval()
+
+    @interval.setter
+    def interval(self, value):
+        self._timer.setInterval(value)
+
+    @property
+    def pending(self):
+        """Whether a value is waiting to be delivered."""
+        return self._pending
+
+    def push(self, value):
+        """
+        Queue a value for delivery, replacing any value still waiting.
+
+        Parameters
+        ----------
+        value : object
+            The value to deliver.
+        """
+        self._value = value
+        self._pending = True
+
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """Deliver the waiting value, if any, immediately."""
+        self._timer.stop()
+
+        if self._pending:
+            value, self._value = self._value, None
+            self._pending = False
+            self.triggered.emit(value)
+
+    def cancel(self):
+        """Drop the waiting value, if any, without delivering it."""
+        self._timer.stop()
+        self._value = None
+        self._pending = False
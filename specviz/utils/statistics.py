@@ -0,0 +1,726 @@
+"""
+Fast summary statistics of spectra.
+
+Computing each statistic of a spectrum separately makes one pass over the
+data per statistic, and going through :class:`~astropy.units.Quantity` adds
+temporary arrays to each. :func:`fused_stats` instead computes all of the
+moments, the extrema, and the integral of the flux together in a single
+pass over the raw values. The values are processed in chunks small enough to
+stay in the processor cache, so the several operations applied to each chunk
+only read it from memory once.
+
+Statistics of a region of a spectrum are recomputed on every move of the
+region while it is dragged. A :class:`RegionStatsIndex` is built once per
+spectrum, after which the statistics of any region are found without
+scanning its values.
+:func:`batch_region_stats` uses one to compute the statistics of many
+regions of many spectra, building each index once on a pool of threads.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from astropy import units as u
+from astropy.table import Table
+
+__all__ = ['fused_stats', 'median', 'RegionStatsIndex', 'batch_region_stats']
+
+# Statistics columns of the tables built by batch_region_stats, in order
+BATCH_STATS_COLUMNS = ('count', 'mean', 'median', 'stddev', 'rms', 'snr',
+                       'total', 'minval', 'maxval')
+
+# Number of values processed at once, sized so that a chunk and its
+# temporaries fit in the processor cache
+STATS_CHUNK_SIZE = 2 ** 16
+
+
+def fused_stats(values, chunk_size=STATS_CHUNK_SIZE):
+    """
+    Compute summary statistics of an array in a single pass. Non-finite
+    values are ignored.
+
+    The variance is accumulated per chunk and the chunks combined with the
+    parallel algorithm of Chan et al., which is stable even when the mean is
+    large compared to the spread. The integral is the trapezoidal integral
+    with unit spacing, as given by `numpy.trapz`, of each run of finite
+    values, so intervals touching a non-finite value do not contribute.
+
+    Parameters
+    ----------
+    values : :class:`~numpy.ndarray`
+        The values, e.g. the flux of a spectrum.
+    chunk_size : int, optional
+        Number of values processed at once.
+
+    Returns
+    -------
+    dict
+        The number of finite values, ``'count'``, and their ``'sum'``,
+        ``'mean'``, population standard deviation ``'stddev'``, root mean
+        square ``'rms'``, ``'minval'``, ``'maxval'``, and integral
+        ``'total'``. Every statistic but the count and the sum is NaN if
+        there are no finite values.
+    """
+    values = np.ravel(values)
+
+    count = 0
+    total_sum = 0.0
+    sum_squares = 0.0
+    mean = 0.0
+    m2 = 0.0
+    min_value = np.inf
+    max_value = -np.inf
+
+    # Sum of the values at either end of each run of finite values, which is
+    # all that is needed to turn the sum into the trapezoidal integral
+    run_ends = 0.0
+    previous_finite = False
+    previous_value = 0.0
+
+    buffer = np.empty(min(chunk_size, values.size))
+
+    for start in range(0, values.size, chunk_size):
+        chunk = values[start:start + chunk_size]
+        finite = np.isfinite(chunk)
+
+        if finite.all():
+            if not previous_finite:
+                run_ends += chunk[0]
+        else:
+            # Ends of runs falling on the last value are only known once the
+            # next chunk is seen
+            run_starts = finite.copy()
+            run_starts[1:] &= ~finite[:-1]
+            run_starts[0] &= not previous_finite
+
+            run_stops = finite.copy()
+            run_stops[:-1] &= ~finite[1:]
+            run_stops[-1] = False
+
+            if previous_finite and not finite[0]:
+                run_ends += previous_value
+
+            run_ends += chunk[run_starts].sum() + chunk[run_stops].sum()
+
+            previous_value, previous_finite = chunk[-1], finite[-1]
+            chunk = chunk[finite]
+
+            if chunk.size == 0:
+                continue
+
+        if finite[-1]:
+            previous_value, previous_finite = chunk[-1], True
+
+        chunk_count = chunk.size
+        chunk_sum = chunk.sum()
+        chunk_mean = chunk_sum / chunk_count
+
+        deviations = np.subtract(chunk, chunk_mean, out=buffer[:chunk_count])
+        chunk_m2 = np.dot(deviations, deviations)
+
+        # Combine the moments of the chunk with those accumulated so far
+        combined_count = count + chunk_count
+        delta = chunk_mean - mean
+        mean += delta * chunk_count / combined_count
+        m2 += chunk_m2 + delta ** 2 * count * chunk_count / combined_count
+        count = combined_count
+
+        total_sum += chunk_sum
+        sum_squares += np.dot(chunk, chunk)
+        min_value = min(min_value, chunk.min())
+        max_value = max(max_value, chunk.max())
+
+    if previous_finite:
+        run_ends += previous_value
+
+    if count == 0:
+        return {'count': 0, 'sum': 0.0, 'mean': np.nan, 'stddev': np.nan,
+                'rms': np.nan, 'minval': np.nan, 'maxval': np.nan,
+                'total': np.nan}
+
+    return {'count': count,
+            'sum': total_sum,
+            'mean': mean,
+            'stddev': np.sqrt(m2 / count),
+            'rms': np.sqrt(sum_squares / count),
+            'minval': min_value,
+            'maxval': max_value,
+            'total': total_sum - 0.5 * run_ends}
+
+
+def median(values):
+    """
+    Median of the finite values of an array, or NaN if there are none.
+
+    This partitions a copy of the values once around the middle, rather
+    than around both middle values as `numpy.median` does, and takes the
+    other middle value of an even count from the lower partition.
+
+    Parameters
+    ----------
+    values : :class:`~numpy.ndarray`
+        The values.
+
+    Returns
+    -------
+    float
+        The median.
+    """
+    values = np.ravel(values)
+    finite = np.isfinite(values)
+    values = values.copy() if finite.all() else values[finite]
+
+    if values.size == 0:
+        return np.nan
+
+    middle = values.size // 2
+    values.partition(middle)
+
+    if values.size % 2 == 1:
+        return values[middle]
+
+    return (values[:middle].max() + values[middle]) / 2
+
+
+class RegionStatsIndex:
+    """
+    Tables of a spectrum, from which the statistics of the values within any
+    range of the spectral axis are found with two binary searches, scanning
+    at most two partial blocks of values however wide the range.
+
+    The count, mean, and sum of squared deviations from the mean of the
+    finite values of runs of whole blocks are kept in a table, whose level
+    ``l`` holds runs of ``2 ** l`` blocks. The moments of a range are
+    combined from at most one entry per level and the partial blocks at
+    either end, with the parallel formula of Chan et al. Every entry is
+    centred on its own mean, so the variance of a range is as precise as if
+    it had been computed from its values, even beside values far larger
+    than them, such as a bright line. Running sums of the whole spectrum
+    would lose the variance of such a range to cancellation. The running
+    trapezoidal integral is stored if there are non-finite values, otherwise
+    the integral follows from the sum.
+
+    The extrema and the median cannot be combined from moments. For the
+    extrema, the minimum and maximum of blocks of values are kept in a
+    sparse table, which gives the extrema of any run of whole blocks from
+    two overlapping entries, and only the partial blocks at either end of a
+    range are scanned. For the median, the values are ranked, and the ranks
+    within each block sorted. The number of values in a range ranked at
+    most ``r`` is then found with a binary search per whole block, and the
+    median by a binary search over ``r``. This is built the first time a
+    median is requested.
+
+    Parameters
+    ----------
+    spectral_axis : :class:`~numpy.ndarray`
+        Spectral axis values.
+    values : :class:`~numpy.ndarray`
+        Values to summarize, e.g. the flux, at each spectral axis value.
+    """
+    # Number of values per block of the moments table
+    MOMENTS_BLOCK_SIZE = 1024
+
+    # Number of values per block of the extrema sparse table
+    EXTREMA_BLOCK_SIZE = 1024
+
+    # Number of values per block of sorted ranks used to find medians
+    MEDIAN_BLOCK_SIZE = 2 ** 14
+
+    def __init__(self, spectral_axis, values):
+        spectral_axis = np.asarray(spectral_axis, dtype=float).ravel()
+        values = np.asarray(values, dtype=float).ravel()
+
+        # Ranges are looked up by binary search, so the spectral axis is put
+        # in ascending order
+        if spectral_axis.size > 1 and np.any(np.diff(spectral_axis) < 0):
+            order = np.argsort(spectral_axis, kind='stable')
+            spectral_axis, values = spectral_axis[order], values[order]
+
+        self._spectral_axis = spectral_axis
+        self._values = values
+
+        finite = np.isfinite(values)
+        self._all_finite = bool(finite.all())
+
+        finite_values = values if self._all_finite else \
+            np.where(finite, values, np.nan)
+
+        self._moments = self._moments_table(finite_values)
+
+        if self._all_finite:
+            self._integrals = None
+        else:
+            # Integral of each interval between neighbouring finite values
+            intervals = values[:-1] + values[1:]
+            intervals[~(finite[:-1] & finite[1:])] = 0
+            intervals *= 0.5
+
+            self._integrals = self._prefix(intervals)
+
+        self._minima = self._sparse_table(finite_values, np.fmin)
+        self._maxima = self._sparse_table(finite_values, np.fmax)
+
+        # Built when a median is first requested
+        self._ranks = None
+        self._block_ranks = None
+        self._order = None
+        self._finite_count = int(finite.sum())
+
+    @staticmethod
+    def _prefix(values, dtype=float):
+        prefix = np.zeros(values.size + 1, dtype=dtype)
+        np.cumsum(values, out=prefix[1:])
+
+        return prefix
+
+    @staticmethod
+    def _merge_moments(first, second):
+        """
+        Combine the count, mean, and sum of squared deviations of two sets of
+        values, or of two arrays of sets, with the formula of Chan et al.
+        """
+        first_count, first_mean, first_m2 = first
+        second_count, second_mean, second_m2 = second
+
+        count = first_count + second_count
+        delta = second_mean - first_mean
+        weight = second_count / np.maximum(count, 1)
+
+        return (count, first_mean + delta * weight,
+                first_m2 + second_m2 + delta ** 2 * first_count * weight)
+
+    def _moments_table(self, values):
+        """
+        Levels of block moments, where column ``i`` of level ``l`` holds the
+        count, mean, and sum of squared deviations of the finite values of
+        the ``2 ** l`` blocks starting at block ``i``. Non-finite values must
+        be NaN.
+        """
+        if values.size == 0:
+            return []
+
+        block_size = self.MOMENTS_BLOCK_SIZE
+        blocks = np.full(-(-values.size // block_size) * block_size, np.nan)
+        blocks[:values.size] = values
+        blocks = blocks.reshape(-1, block_size)
+
+        counts = np.count_nonzero(~np.isnan(blocks), axis=1).astype(float)
+        means = np.nansum(blocks, axis=1) / np.maximum(counts, 1)
+
+        blocks -= means[:, np.newaxis]
+        m2 = np.nansum(np.square(blocks, out=blocks), axis=1)
+
+        levels = [np.array([counts, means, m2])]
+
+        while 2 ** len(levels) <= counts.size:
+            half = 2 ** (len(levels) - 1)
+            levels.append(np.array(self._merge_moments(
+                levels[-1][:, :-half], levels[-1][:, half:])))
+
+        return levels
+
+    def _scan_moments(self, start, stop):
+        values = self._values[start:stop]
+
+        if not self._all_finite:
+            values = values[np.isfinite(values)]
+
+        if values.size == 0:
+            return 0, 0.0, 0.0
+
+        mean = values.mean()
+        deviations = values - mean
+
+        return values.size, float(mean), float(np.dot(deviations, deviations))
+
+    def _range_moments(self, start, stop):
+        block_size = self.MOMENTS_BLOCK_SIZE
+        first_block = -(-start // block_size)
+        last_block = stop // block_size
+
+        # Only the partial blocks at either end of the range are scanned
+        if first_block >= last_block:
+            return self._scan_moments(start, stop)
+
+        moments = self._scan_moments(start, first_block * block_size)
+
+        # Moments cannot be combined from overlapping runs of blocks, as the
+        # extrema are, so the whole blocks are split into disjoint runs
+        block = first_block
+
+        while block < last_block:
+            level = (last_block - block).bit_length() - 1
+            moments = self._merge_moments(
+                moments, self._moments[level][:, block].tolist())
+            block += 2 ** level
+
+        return self._merge_moments(
+            moments, self._scan_moments(last_block * block_size, stop))
+
+    def _sparse_table(self, values, reduce):
+        """
+        Levels of block extrema, where entry ``i`` of level ``l`` reduces the
+        ``2 ** l`` blocks starting at block ``i``. Non-finite values must be
+        NaN, which the `numpy.fmin` and `numpy.fmax` reductions ignore.
+        """
+        if values.size == 0:
+            return []
+
+        levels = [reduce.reduceat(
+            values, np.arange(0, values.size, self.EXTREMA_BLOCK_SIZE))]
+
+        while 2 ** len(levels) <= levels[0].size:
+            half = 2 ** (len(levels) - 1)
+            levels.append(reduce(levels[-1][:-half], levels[-1][half:]))
+
+        return levels
+
+    def _reduce_finite(self, start, stop, reduce):
+        values = self._values[start:stop]
+
+        if not self._all_finite:
+            values = values[np.isfinite(values)]
+
+        return reduce.reduce(values) if values.size > 0 else np.nan
+
+    def _extreme(self, start, stop, levels, reduce):
+        block_size = self.EXTREMA_BLOCK_SIZE
+        first_block = -(-start // block_size)
+        last_block = stop // block_size
+
+        # Only the partial blocks at either end of the range are scanned
+        if first_block >= last_block:
+            return self._reduce_finite(start, stop, reduce)
+
+        level = (last_block - first_block).bit_length() - 1
+        result = reduce(levels[level][first_block],
+                        levels[level][last_block - 2 ** level])
+
+        if start < first_block * block_size:
+            result = reduce(result, self._reduce_finite(
+                start, first_block * block_size, reduce))
+
+        if last_block * block_size < stop:
+            result = reduce(result, self._reduce_finite(
+                last_block * block_size, stop, reduce))
+
+        return result
+
+    def _build_ranks(self):
+        size = self._values.size
+        index_type = np.int32 if size < 2 ** 31 else np.int64
+
+        # Non-finite values are ranked last, so that only the ranks below
+        # the number of finite values are ever selected
+        order = np.argsort(np.where(np.isfinite(self._values), self._values,
+                                    np.nan), kind='stable')
+
+        ranks = np.empty(size, dtype=index_type)
+        ranks[order] = np.arange(size, dtype=index_type)
+
+        # Sort the ranks of each block, padding the last block with ranks
+        # that sort after every other, then offset them by their block
+        # number so that all blocks can be searched as one array
+        block_size = self.MEDIAN_BLOCK_SIZE
+        block_count = -(-size // block_size)
+
+        block_ranks = np.full(block_count * block_size, size, dtype=np.int64)
+        block_ranks[:size] = ranks
+        block_ranks = block_ranks.reshape(block_count, block_size)
+        block_ranks.sort(axis=1)
+        block_ranks += np.arange(block_count, dtype=np.int64)[:, None] * size
+        block_ranks = block_ranks.ravel()[:size]
+
+        self._order = order.astype(index_type)
+        self._ranks = ranks
+        self._block_ranks = block_ranks
+
+    def _count_ranked(self, start, stop, rank):
+        """The number of values between two positions ranked at most rank."""
+        block_size = self.MEDIAN_BLOCK_SIZE
+        first_block = -(-start // block_size)
+        last_block = stop // block_size
+
+        if first_block >= last_block:
+            return np.count_nonzero(self._ranks[start:stop] <= rank)
+
+        blocks = np.arange(first_block, last_block, dtype=np.int64)
+        count = int((np.searchsorted(self._block_ranks,
+                                     blocks * self._values.size + rank,
+                                     side='right') -
+                     blocks * block_size).sum())
+
+        count += np.count_nonzero(
+            self._ranks[start:first_block * block_size] <= rank)
+        count += np.count_nonzero(
+            self._ranks[last_block * block_size:stop] <= rank)
+
+        return count
+
+    def _select(self, start, stop, k):
+        """The ``k``-th smallest finite value between two positions."""
+        low, high = 0, self._finite_count - 1
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self._count_ranked(start, stop, middle) > k:
+                high = middle
+            else:
+                low = middle + 1
+
+        return self._values[self._order[low]]
+
+    def minimum(self, start=0, stop=None):
+        """The minimum finite value between two positions, or NaN."""
+        stop = len(self) if stop is None else stop
+
+        if stop <= start:
+            return np.nan
+
+        return self._extreme(start, stop, self._minima, np.fmin)
+
+    def maximum(self, start=0, stop=None):
+        """The maximum finite value between two positions, or NaN."""
+        stop = len(self) if stop is None else stop
+
+        if stop <= start:
+            return np.nan
+
+        return self._extreme(start, stop, self._maxima, np.fmax)
+
+    def median(self, start=0, stop=None):
+        """The median of the finite values between two positions, or NaN."""
+        stop = len(self) if stop is None else stop
+        count = self.stats(start, stop)['count']
+
+        if count == 0:
+            return np.nan
+
+        if self._ranks is None:
+            self._build_ranks()
+
+        upper = self._select(start, stop, count // 2)
+
+        if count % 2 == 1:
+            return upper
+
+        return (self._select(start, stop, count // 2 - 1) + upper) / 2
+
+    def summary(self, start=0, stop=None):
+        """
+        All statistics of the finite values between two positions, i.e.
+        those of :meth:`stats` along with the extrema and the median.
+
+        Parameters
+        ----------
+        start, stop : int, optional
+            Range of positions, as returned by :meth:`span`. Defaults to all
+            values.
+
+        Returns
+        -------
+        dict
+            The statistics of :func:`fused_stats`, and the median.
+        """
+        stats = self.stats(start, stop)
+        stats['minval'] = self.minimum(start, stop)
+        stats['maxval'] = self.maximum(start, stop)
+        stats['median'] = self.median(start, stop)
+
+        return stats
+
+    def __len__(self):
+        return self._values.size
+
+    @property
+    def spectral_axis(self):
+        """The spectral axis values, in ascending order."""
+        return self._spectral_axis
+
+    @property
+    def values(self):
+        """The values, in the order of the ascending spectral axis."""
+        return self._values
+
+    def span(self, lower, upper):
+        """
+        Positions of the values whose spectral axis value lies within a
+        range, bounds included.
+
+        Parameters
+        ----------
+        lower, upper : float
+            Bounds of the range, in the unit of the spectral axis.
+
+        Returns
+        -------
+        tuple
+            The start and stop positions of the values.
+        """
+        start = np.searchsorted(self._spectral_axis, lower, side='left')
+        stop = np.searchsorted(self._spectral_axis, upper, side='right')
+
+        return int(start), max(int(stop), int(start))
+
+    def stats(self, start=0, stop=None):
+        """
+        Statistics of the finite values between two positions, computed from
+        the moments table.
+
+        Parameters
+        ----------
+        start, stop : int, optional
+            Range of positions, as returned by :meth:`span`. Defaults to all
+            values.
+
+        Returns
+        -------
+        dict
+            The same statistics as :func:`fused_stats`, apart from the
+            extrema.
+        """
+        stop = len(self) if stop is None else stop
+
+        count, mean, m2 = self._range_moments(start, stop)
+        count = int(count)
+
+        if count == 0:
+            return {'count': 0, 'sum': 0.0, 'mean': np.nan,
+                    'stddev': np.nan, 'rms': np.nan, 'total': np.nan}
+
+        variance = m2 / count
+        total_sum = mean * count
+
+        if self._integrals is None:
+            total = total_sum - 0.5 * (self._values[start] +
+                                       self._values[stop - 1])
+        else:
+            total = self._integrals[stop - 1] - self._integrals[start]
+
+        return {'count': count,
+                'sum': total_sum,
+                'mean': mean,
+                'stddev': np.sqrt(variance),
+                'rms': np.sqrt(variance + mean ** 2),
+                'total': total}
+
+
+def _region_bounds(regions, unit, cache):
+    """
+    Sorted bounds of each region in a spectral unit, or `None` if the units
+    are not compatible. Conversions are cached, as spectra usually share
+    their units.
+    """
+    if unit not in cache:
+        if all(unit.is_equivalent(lower.unit, equivalencies=u.spectral())
+               for lower, _ in regions):
+            cache[unit] = [sorted(x.to_value(unit, equivalencies=u.spectral())
+                                  for x in region) for region in regions]
+        else:
+            cache[unit] = None
+
+    return cache[unit]
+
+
+def _spectrum_region_stats(spectrum, regions, cache):
+    """
+    Statistics of the flux of a spectrum within each of a list of regions.
+    The spectrum is indexed once for all of the regions. Medians are taken
+    from the values of each region, as building the ranks of the index only
+    pays off for many more regions.
+    """
+    if callable(spectrum):
+        spectrum = spectrum()
+
+    bounds = _region_bounds(regions, spectrum.spectral_axis.unit, cache)
+
+    if bounds is None:
+        return spectrum.flux.unit, [None] * len(regions)
+
+    index = RegionStatsIndex(spectrum.spectral_axis.value,
+                             spectrum.flux.value)
+    rows = []
+
+    for lower, upper in bounds:
+        start, stop = index.span(lower, upper)
+
+        stats = index.stats(start, stop)
+        stats['minval'] = index.minimum(start, stop)
+        stats['maxval'] = index.maximum(start, stop)
+        stats['median'] = median(index.values[start:stop])
+
+        rows.append(stats)
+
+    return spectrum.flux.unit, rows
+
+
+def batch_region_stats(spectra, regions, names=None, max_workers=None):
+    """
+    Compute the statistics of the flux of every spectrum within every
+    region. Each spectrum is indexed once, in a pool of threads, and the
+    index used for all of its regions.
+
+    Parameters
+    ----------
+    spectra : list
+        The :class:`~specutils.Spectrum1D` spectra, or callables returning
+        them, which are called in the pool, e.g. to load spectra lazily.
+    regions : list
+        Bounds of the regions, as pairs of :class:`~astropy.units.Quantity`.
+    names : list, optional
+        Names of the spectra. Defaults to their position in the list.
+    max_workers : int, optional
+        Maximum number of spectra indexed concurrently. Defaults to that of
+        :class:`~concurrent.futures.ThreadPoolExecutor`.
+
+    Returns
+    -------
+    :class:`~astropy.table.Table`
+        A row for each spectrum and region, with the name of the spectrum,
+        the region number and bounds, the columns of `BATCH_STATS_COLUMNS`,
+        and the flux unit. Regions whose units are not compatible with the
+        spectral axis of a spectrum, or that hold no finite values, have a
+        count of zero and NaN statistics.
+    """
+    spectra = list(spectra)
+    regions = [(u.Quantity(lower), u.Quantity(upper))
+               for lower, upper in regions]
+    names = list(range(len(spectra))) if names is None else list(names)
+
+    # Bounds are tabulated in the units of the first region
+    region_unit = regions[0][0].unit if regions else u.Unit("")
+
+    # Region bounds converted to each spectral unit, shared by the threads
+    bounds_cache = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            lambda spectrum: _spectrum_region_stats(spectrum, regions,
+                                                    bounds_cache),
+            spectra))
+
+    columns = {key: [] for key in ('data', 'region', 'lower', 'upper') +
+               BATCH_STATS_COLUMNS + ('flux_unit',)}
+
+    for name, (flux_unit, rows) in zip(names, results):
+        for number, ((lower, upper), stats) in enumerate(zip(regions, rows)):
+            stats = stats or {'count': 0}
+            stats['snr'] = stats.get('mean', np.nan) / stats.get('rms', np.nan)
+
+            columns['data'].append(str(name))
+            columns['region'].append(number + 1)
+            columns['lower'].append(lower.to_value(
+                region_unit, equivalencies=u.spectral()))
+            columns['upper'].append(upper.to_value(
+                region_unit, equivalencies=u.spectral()))
+            columns['flux_unit'].append(flux_unit.to_string())
+
+            for key in BATCH_STATS_COLUMNS:
+                columns[key].append(stats.get(key, np.nan))
+
+    table = Table(columns, dtype=[str, int, float, float, int] +
+                  [float] * (len(BATCH_STATS_COLUMNS) - 1) + [str])
+
+    table['lower'].unit = table['upper'].unit = region_unit
+
+    return table
@@ -0,0 +1,46 @@
+import numpy as np
+
+from ..decimation import EnvelopePyramid
+
+
+def test_envelope_pyramid():
+    values = np.random.sample(100001)
+    values[12345] = 10
+    values[54321] = -10
+    values[1000:3000] = np.nan
+
+    pyramid = EnvelopePyramid(values, min_bins=16)
+
+    assert pyramid.size == values.size
+    assert pyramid.indices(0) is None
+
+    for level in range(1, len(pyramid)):
+        indices = pyramid.indices(level)
+
+        # Indices are ordered, and every level keeps the extreme values
+        assert np.all(np.diff(indices) >= 0)
+        assert np.nanmax(values[indices]) == 10
+        assert np.nanmin(values[indices]) == -10
+
+        # NaN values are only kept for bins holding nothing else
+        bin_size = 2 ** level
+        nan_bins = np.isnan(values[indices[0::2]])
+        expected_nan_bins = [np.all(np.isnan(values[i:i + bin_size]))
+                             for i in range(0, values.size, bin_size)]
+
+        assert np.array_equal(nan_bins, expected_nan_bins)
+
+
+def test_envelope_pyramid_level_for():
+    pyramid = EnvelopePyramid(np.random.sample(2 ** 20))
+
+    # Few enough values to draw them all
+    assert pyramid.level_for(1000, 1000) == 0
+
+    # Bins of the chosen level span at most one pixel
+    level = pyramid.level_for(2 ** 20, 1000)
+
+    assert 2 ** level <= 2 ** 20 / 1000 < 2 ** (level + 1)
+
+    # Levels are limited to those that have been built
+    assert pyramid.level_for(2 ** 40, 1) == len(pyramid) - 1
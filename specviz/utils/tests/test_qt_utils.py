@@ -0,0 +1,59 @@
+from .. import qt_utils
+from ..qt_utils import IconCache, SignalThrottle
+
+
+def test_icon_cache(monkeypatch):
+    rendered = []
+
+    def render_icon(name, color=None):
+        rendered.append((name, color))
+        return object()
+
+    monkeypatch.setattr(qt_utils.qta, 'icon', render_icon)
+
+    cache = IconCache(max_size=2)
+
+    eye = cache.icon('fa.eye', '#000000')
+
+    # Repeated requests are served without rendering again
+    assert cache.icon('fa.eye', '#000000') is eye
+    assert rendered == [('fa.eye', '#000000')]
+    assert cache.hits == 1 and cache.misses == 1
+    assert cache.hit_rate == 0.5
+
+    # The least recently used icon is dropped once the cache is full
+    cache.icon('fa.eye-slash', '#000000')
+    cache.icon('fa.eye', '#9b59b6')
+
+    assert len(cache) == 2
+    assert cache.icon('fa.eye', '#000000') is not eye
+    assert len(rendered) == 4
+
+
+def test_signal_throttle(qtbot):
+    throttle = SignalThrottle(interval=50)
+    delivered = []
+    throttle.triggered.connect(delivered.append)
+
+    # Values pushed within an interval are coalesced into the latest one
+    for value in range(100):
+        throttle.push(value)
+
+    assert delivered == []
+
+    qtbot.waitUntil(lambda: len(delivered) > 0, timeout=1000)
+
+    assert delivered == [99]
+    assert not throttle.pending
+
+    # Cancelled values are never delivered
+    throttle.push(100)
+    throttle.cancel()
+    qtbot.wait(100)
+
+    assert delivered == [99]
+
+    throttle.push(101)
+    throttle.flush()
+
+    assert delivered == [99, 101]
@@ -0,0 +1,211 @@
+import astropy.units as u
+import numpy as np
+import pytest
+from specutils import Spectrum1D
+
+from ..statistics import (RegionStatsIndex, batch_region_stats, fused_stats,
+                          median)
+
+
+def trapezoid(values):
+    return np.sum(values[1:] + values[:-1]) / 2
+
+
+def reference_total(values):
+    # Trapezoidal integral of each run of finite values
+    finite = np.isfinite(values)
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], finite, [0]])))
+
+    return sum(trapezoid(values[start:stop])
+               for start, stop in zip(edges[0::2], edges[1::2]))
+
+
+@pytest.mark.parametrize('chunk_size', [7, 64, 2 ** 16])
+def test_fused_stats(chunk_size):
+    values = np.random.normal(1e4, 3, 10001)
+    values[[0, 500, 501, 502, 3333, 10000]] = np.nan
+    values[64:128] = np.nan
+    values[700] = np.inf
+
+    stats = fused_stats(values, chunk_size=chunk_size)
+    finite = values[np.isfinite(values)]
+
+    assert stats['count'] == finite.size
+    assert np.isclose(stats['sum'], finite.sum(), rtol=1e-12)
+    assert np.isclose(stats['mean'], finite.mean(), rtol=1e-12)
+    assert np.isclose(stats['stddev'], finite.std(), rtol=1e-9)
+    assert np.isclose(stats['rms'], np.sqrt(np.mean(finite ** 2)),
+                      rtol=1e-12)
+    assert stats['minval'] == finite.min()
+    assert stats['maxval'] == finite.max()
+    assert np.isclose(stats['total'], reference_total(values), rtol=1e-12)
+
+
+def test_fused_stats_matches_numpy_without_gaps():
+    values = np.random.sample(1000)
+    stats = fused_stats(values, chunk_size=100)
+
+    assert np.isclose(stats['total'], trapezoid(values))
+    assert np.isclose(stats['stddev'], values.std())
+
+
+def test_fused_stats_no_finite_values():
+    stats = fused_stats(np.full(10, np.nan))
+
+    assert stats['count'] == 0
+    assert np.isnan(stats['mean']) and np.isnan(stats['total'])
+
+
+def test_median():
+    for size in (1, 2, 101, 1000):
+        values = np.random.sample(size)
+
+        assert median(values) == np.median(values)
+
+    values[[3, 30, 300]] = np.nan
+
+    assert median(values) == np.nanmedian(values)
+    assert np.isnan(median(np.full(3, np.nan)))
+
+
+def test_region_stats_index():
+    spectral_axis = np.linspace(4000, 5000, 10001)
+    values = np.random.normal(1e4, 3, spectral_axis.size)
+    values[[10, 500, 501, 4000]] = np.nan
+
+    # Descending axes give the same results as ascending ones
+    for order in (slice(None), slice(None, None, -1)):
+        index = RegionStatsIndex(spectral_axis[order], values[order])
+
+        assert np.array_equal(index.spectral_axis, spectral_axis)
+
+        for lower, upper in [(4000, 5000), (4001.05, 4050), (4300, 4300.1),
+                             (3000, 4000.1)]:
+            start, stop = index.span(lower, upper)
+            in_range = (spectral_axis >= lower) & (spectral_axis <= upper)
+            expected = fused_stats(values[in_range])
+            stats = index.stats(start, stop)
+
+            assert np.array_equal(index.values[start:stop], values[in_range],
+                                  equal_nan=True)
+            assert stats['count'] == expected['count']
+
+            for key in ('sum', 'mean', 'rms', 'total'):
+                assert np.isclose(stats[key], expected[key], rtol=1e-9)
+
+            assert np.isclose(stats['stddev'], expected['stddev'], rtol=1e-6)
+
+    # Without non-finite values, counts and integrals are derived
+    index = RegionStatsIndex(spectral_axis, np.arange(10001.0))
+
+    assert np.isclose(index.stats(10, 20)['total'],
+                      trapezoid(np.arange(10.0, 20.0)))
+    assert index.stats(5, 5)['count'] == 0
+
+
+@pytest.mark.parametrize('block_size', [64, 1024])
+def test_region_stats_index_precision(block_size):
+    size = 100000
+    continuum = 1 + 1e-3 * np.random.standard_normal(size)
+
+    # A bright line, and a step far above the continuum
+    line = continuum.copy()
+    line[50000:51000] *= 1000
+    step = continuum.copy()
+    step[size // 2:] += 1e6
+
+    class BlockIndex(RegionStatsIndex):
+        MOMENTS_BLOCK_SIZE = block_size
+
+    for values in (line, step):
+        index = BlockIndex(np.arange(size), values)
+
+        # Regions of the continuum are as precise as if computed from their
+        # own values, as are regions straddling the line or step
+        for start, stop in [(60000, 60100), (10000, 10100), (20000, 90000),
+                            (49000, 52000), (10, size)]:
+            region = values[start:stop]
+            stats = index.stats(start, stop)
+
+            assert np.isclose(stats['mean'], region.mean(), rtol=1e-12)
+            assert np.isclose(stats['stddev'], region.std(), rtol=1e-9)
+            assert np.isclose(stats['rms'], np.sqrt(np.mean(region ** 2)),
+                              rtol=1e-12)
+
+
+def test_region_stats_index_order_statistics():
+    size = 20000
+    values = np.round(np.random.normal(0, 10, size))
+    values[np.random.randint(0, size, 100)] = np.nan
+    values[123] = np.inf
+    values[5000:7000] = np.nan
+
+    # Small blocks, so that ranges span both whole and partial blocks
+    class SmallBlockIndex(RegionStatsIndex):
+        MOMENTS_BLOCK_SIZE = 64
+        EXTREMA_BLOCK_SIZE = 64
+        MEDIAN_BLOCK_SIZE = 256
+
+    index = SmallBlockIndex(np.arange(size), values)
+
+    for start, stop in [(0, size), (10, 11), (100, 160), (130, 4100),
+                        (4999, 7001), (5100, 6900), (777, 19999)]:
+        region = values[start:stop]
+        finite = region[np.isfinite(region)]
+
+        if finite.size == 0:
+            assert np.isnan(index.median(start, stop))
+            assert np.isnan(index.minimum(start, stop))
+            continue
+
+        assert index.stats(start, stop)['count'] == finite.size
+        assert np.isclose(index.stats(start, stop)['stddev'], finite.std())
+
+        # Ties are common, since the values are rounded
+        assert index.median(start, stop) == np.median(finite)
+        assert index.minimum(start, stop) == finite.min()
+        assert index.maximum(start, stop) == finite.max()
+
+
+def test_batch_region_stats():
+    size = 5000
+    flux = 1 + 1e-3 * np.random.standard_normal(size)
+    flux[500:600] = np.nan
+    spectral_axis = np.linspace(4000, 5000, size)
+
+    # A bright line must not spoil the statistics of the continuum
+    flux[1500:1550] *= 1e6
+
+    spectra = [Spectrum1D(flux=flux * u.Jy, spectral_axis=spectral_axis * u.AA),
+               Spectrum1D(flux=flux * u.mJy,
+                          spectral_axis=spectral_axis * u.pix)]
+    bounds = [(4050, 4150), (4800, 4600), (4250, 4350)]
+    regions = [bound * u.AA for bound in bounds] + [(1, 2) * u.um]
+
+    # Spectra may also be loaded on demand
+    table = batch_region_stats([spectra[0], lambda: spectra[1]], regions,
+                               names=["a", "b"], max_workers=2)
+
+    assert len(table) == 8
+    assert list(table['data']) == ["a"] * 4 + ["b"] * 4
+    assert list(table['region']) == [1, 2, 3, 4] * 2
+    assert table['lower'].unit == u.AA
+    assert list(table['flux_unit']) == ['Jy'] * 4 + ['mJy'] * 4
+
+    for row, bound in zip(table, bounds):
+        lower, upper = sorted(bound)
+        inside = (spectral_axis >= lower) & (spectral_axis <= upper)
+        values = flux[inside & np.isfinite(flux)]
+
+        assert row['count'] == values.size
+        assert np.isclose(row['mean'], values.mean(), rtol=1e-12)
+        assert np.isclose(row['median'], np.median(values))
+        assert np.isclose(row['stddev'], values.std(), rtol=1e-9)
+        assert row['minval'] == values.min()
+        assert row['maxval'] == values.max()
+        assert np.isclose(row['snr'], row['mean'] / row['rms'])
+
+    # Regions outside the spectrum, or in incompatible units, hold nothing
+    for row in table[3:]:
+        assert row['count'] == 0
+        assert np.isnan(row['mean']) and np.isnan(row['median'])
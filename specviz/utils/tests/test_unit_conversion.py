@@ -0,0 +1,70 @@
+import astropy.units as u
+import numpy as np
+import pytest
+
+from ..unit_conversion import (convert_flux, convert_spectral_axis,
+                               flux_converter, spectral_axis_converter)
+
+FLAM = u.Unit('erg / (s cm2 Angstrom)')
+FNU = u.Unit('erg / (s cm2 Hz)')
+PHOTLAM = u.Unit('ph / (s cm2 Angstrom)')
+
+
+@pytest.mark.parametrize(('from_unit', 'to_unit', 'kind'), [
+    (u.AA, u.AA, 'scale'),
+    (u.AA, u.um, 'scale'),
+    (u.AA, u.Hz, 'reciprocal'),
+    (u.GHz, u.keV, 'scale'),
+    (u.eV, u.nm, 'reciprocal'),
+    (u.Unit('1 / cm'), u.THz, 'scale'),
+])
+def test_spectral_axis_conversion(from_unit, to_unit, kind):
+    values = np.linspace(4000, 9000, 1001)
+
+    assert spectral_axis_converter(from_unit, to_unit).kind == kind
+
+    expected = (values * from_unit).to_value(to_unit,
+                                              equivalencies=u.spectral())
+
+    np.testing.assert_allclose(
+        convert_spectral_axis(values, from_unit, to_unit), expected,
+        rtol=1e-12)
+
+
+@pytest.mark.parametrize(('from_unit', 'to_unit', 'spectral_axis_unit',
+                          'kind'), [
+    (u.Jy, u.mJy, u.AA, 'scale'),
+    (u.Jy, FNU, u.AA, 'scale'),
+    (u.Jy, FLAM, u.AA, 'power'),
+    (FLAM, u.Jy, u.um, 'power'),
+    (FNU, FLAM, u.Hz, 'power'),
+    (PHOTLAM, FLAM, u.AA, 'power'),
+    (u.ABmag, u.Jy, u.AA, 'astropy'),
+])
+def test_flux_conversion(from_unit, to_unit, spectral_axis_unit, kind):
+    spectral_axis = np.linspace(4000, 9000, 1001)
+    values = np.random.sample(spectral_axis.size) + 1
+
+    assert flux_converter(from_unit, to_unit,
+                          spectral_axis_unit).kind == kind
+
+    expected = (values * from_unit).to_value(
+        to_unit, equivalencies=u.spectral_density(
+            spectral_axis * spectral_axis_unit))
+
+    np.testing.assert_allclose(
+        convert_flux(values, spectral_axis, from_unit, to_unit,
+                     spectral_axis_unit), expected, rtol=1e-12)
+
+
+def test_conversion_in_place():
+    spectral_axis = np.linspace(4000, 9000, 1001)
+    values = np.random.sample(spectral_axis.size)
+    expected = (values * u.Jy).to_value(
+        FLAM, equivalencies=u.spectral_density(spectral_axis * u.AA))
+
+    result = convert_flux(values, spectral_axis, u.Jy, FLAM, u.AA,
+                          out=values)
+
+    assert result is values
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
@@ -0,0 +1,276 @@
+"""
+Fast conversion of spectral axis and flux arrays between units.
+
+Converting large arrays through astropy equivalencies goes through the generic
+unit machinery on every call and allocates several temporary arrays. The unit
+conversions used when displaying spectra are almost always a scale factor, a
+reciprocal, or a flux density power law in the spectral axis. Each source and
+target unit pair is therefore resolved once, by probing astropy with a few
+values, into a :class:`ConversionKernel` which applies the conversion with
+in-place NumPy operations. Unit pairs that fit none of these forms fall back
+to astropy.
+"""
+from functools import lru_cache
+
+import astropy.units as u
+import numpy as np
+
+__all__ = ['ConversionKernel', 'spectral_axis_converter', 'flux_converter',
+           'convert_spectral_axis', 'convert_flux']
+
+# Relative tolerance used when checking that a probed conversion fits a form
+_PROBE_RTOL = 1e-10
+
+# Spectral axis values at which conversions are probed
+_PROBE_VALUES = (1.0, 2.0, 3.0)
+
+# Largest power of the spectral axis applied by repeated multiplication
+_MAX_POWER = 4
+
+
+class ConversionKernel:
+    """
+    A unit conversion resolved to a simple arithmetic form.
+
+    Parameters
+    ----------
+    kind : str
+        One of ``'scale'`` (``factor * values``), ``'reciprocal'``
+        (``factor / values``), ``'power'`` (``factor * values *
+        spectral_axis ** power``), or ``'astropy'`` for conversions that are
+        delegated to astropy.
+    factor : float, optional
+        Multiplicative factor of the conversion.
+    power : int, optional
+        Power of the spectral axis for ``'power'`` conversions.
+    from_unit, to_unit : :class:`~astropy.units.Unit`, optional
+        Units of the conversion, used by ``'astropy'`` conversions.
+    spectral_axis_unit : :class:`~astropy.units.Unit`, optional
+        Unit of the spectral axis, used by ``'astropy'`` flux conversions.
+    """
+    def __init__(self, kind, factor=1.0, power=0, from_unit=None,
+                 to_unit=None, spectral_axis_unit=None):
+        self.kind = kind
+        self.factor = factor
+        self.power = power
+        self.from_unit = from_unit
+        self.to_unit = to_unit
+        self.spectral_axis_unit = spectral_axis_unit
+
+    def __repr__(self):
+        return "<ConversionKernel kind='{}' factor={} power={}>".format(
+            self.kind, self.factor, self.power)
+
+    def __call__(self, values, spectral_axis=None, out=None):
+        """
+        Apply the conversion.
+
+        Parameters
+        ----------
+        values : :class:`~numpy.ndarray`
+            Values in the source unit.
+        spectral_axis : :class:`~numpy.ndarray`, optional
+            Spectral axis values, in the unit of the spectral axis the kernel
+            was resolved for. Required by ``'power'`` conversions.
+        out : :class:`~numpy.ndarray`, optional
+            Floating point array in which to store the result. May be
+            ``values`` itself, to convert in place. If not given, a new
+            array is allocated.
+
+        Returns
+        -------
+        :class:`~numpy.ndarray`
+            The values in the target unit.
+        """
+        if self.kind == 'astropy':
+            if self.spectral_axis_unit is None:
+                equivalencies = u.spectral()
+            else:
+                equivalencies = u.spectral_density(
+                    u.Quantity(spectral_axis, self.spectral_axis_unit,
+                               copy=False))
+
+            # Multiplying, rather than constructing a `Quantity`, also
+            # supports function units such as magnitudes
+            result = (np.asarray(values) * self.from_unit).to_value(
+                self.to_unit, equivalencies=equivalencies)
+
+            if out is None:
+                return result
+
+            out[...] = result
+
+            return out
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.kind == 'reciprocal':
+                return np.divide(self.factor, values, out=out)
+
+            # The first operation writes the output, and every following one
+            # updates it in place, so no temporary arrays are allocated
+            out = np.multiply(values, self.factor, out=out)
+
+            if self.kind == 'power':
+                op = np.multiply if self.power > 0 else np.divide
+
+                for _ in range(abs(self.power)):
+                    op(out, spectral_axis, out=out)
+
+        return out
+
+
+def _fit_kernel(probe, allow_reciprocal):
+    """
+    Fit a conversion to a scale, reciprocal, or power law form given a
+    function evaluating it at each of the probe values.
+    """
+    try:
+        results = [float(probe(x)) for x in _PROBE_VALUES]
+    except (u.UnitsError, ValueError, TypeError):
+        return
+
+    if not all(np.isfinite(results)) or results[0] == 0:
+        return
+
+    factor = results[0]
+
+    def fits(power):
+        return all(np.isclose(y, factor * x ** power, rtol=_PROBE_RTOL,
+                              atol=0)
+                   for x, y in zip(_PROBE_VALUES, results))
+
+    if allow_reciprocal:
+        if fits(1):
+            return ConversionKernel('scale', factor)
+        elif fits(-1):
+            return ConversionKernel('reciprocal', factor)
+
+        return
+
+    power = int(round(np.log2(results[1] / factor)))
+
+    if abs(power) <= _MAX_POWER and fits(power):
+        return ConversionKernel('power' if power != 0 else 'scale', factor,
+                                power)
+
+
+@lru_cache(maxsize=256)
+def spectral_axis_converter(from_unit, to_unit):
+    """
+    Resolve the conversion of spectral axis values between two units.
+
+    Parameters
+    ----------
+    from_unit, to_unit : str or :class:`~astropy.units.Unit`
+        Source and target units of the spectral axis.
+
+    Returns
+    -------
+    : :class:`ConversionKernel`
+        The resolved conversion.
+    """
+    from_unit, to_unit = u.Unit(from_unit), u.Unit(to_unit)
+
+    if from_unit == to_unit:
+        return ConversionKernel('scale')
+
+    kernel = _fit_kernel(
+        lambda x: (x * from_unit).to_value(to_unit,
+                                           equivalencies=u.spectral()),
+        allow_reciprocal=True)
+
+    return kernel or ConversionKernel('astropy', from_unit=from_unit,
+                                      to_unit=to_unit)
+
+
+@lru_cache(maxsize=256)
+def flux_converter(from_unit, to_unit, spectral_axis_unit):
+    """
+    Resolve the conversion of flux values between two units, for spectra
+    whose spectral axis is in the given unit.
+
+    Parameters
+    ----------
+    from_unit, to_unit : str or :class:`~astropy.units.Unit`
+        Source and target units of the flux.
+    spectral_axis_unit : str or :class:`~astropy.units.Unit`
+        Unit of the spectral axis values passed to the kernel.
+
+    Returns
+    -------
+    : :class:`ConversionKernel`
+        The resolved conversion.
+    """
+    from_unit, to_unit = u.Unit(from_unit), u.Unit(to_unit)
+    spectral_axis_unit = u.Unit(spectral_axis_unit)
+
+    if from_unit == to_unit:
+        return ConversionKernel('scale')
+
+    def probe(x):
+        equivalencies = u.spectral_density(x * spectral_axis_unit)
+
+        # Conversions must also be linear in the flux to fit any of the forms
+        one, two = (np.array([1.0, 2.0]) * from_unit).to_value(
+            to_unit, equivalencies=equivalencies)
+
+        if not np.isclose(two, 2 * one, rtol=_PROBE_RTOL, atol=0):
+            raise ValueError("Conversion is not linear in the flux.")
+
+        return one
+
+    kernel = _fit_kernel(probe, allow_reciprocal=False)
+
+    return kernel or ConversionKernel('astropy', from_unit=from_unit,
+                                      to_unit=to_unit,
+                                      spectral_axis_unit=spectral_axis_unit)
+
+
+def convert_spectral_axis(values, from_unit, to_unit, out=None):
+    """
+    Convert spectral axis values between units.
+
+    Parameters
+    ----------
+    values : :class:`~numpy.ndarray`
+        Spectral axis values in ``from_unit``.
+    from_unit, to_unit : str or :class:`~astropy.units.Unit`
+        Source and target units of the spectral axis.
+    out : :class:`~numpy.ndarray`, optional
+        Floating point array in which to store the result, which may be
+        ``values`` itself.
+
+    Returns
+    -------
+    :class:`~numpy.ndarray`
+        The spectral axis values in ``to_unit``.
+    """
+    return spectral_axis_converter(from_unit, to_unit)(values, out=out)
+
+
+def convert_flux(values, spectral_axis, from_unit, to_unit,
+                 spectral_axis_unit, out=None):
+    """
+    Convert flux values between units.
+
+    Parameters
+    ----------
+    values : :class:`~numpy.ndarray`
+        Flux values in ``from_unit``.
+    spectral_axis : :class:`~numpy.ndarray`
+        Spectral axis values in ``spectral_axis_unit``.
+    from_unit, to_unit : str or :class:`~astropy.units.Unit`
+        Source and target units of the flux.
+    spectral_axis_unit : str or :class:`~astropy.units.Unit`
+        Unit of the spectral axis values.
+    out : :class:`~numpy.ndarray`, optional
+        Floating point array in which to store the result, which may be
+        ``values`` itself.
+
+    Returns
+    -------
+    :class:`~numpy.ndarray`
+        The flux values in ``to_unit``.
+    """
+    return flux_converter(from_unit, to_unit, spectral_axis_unit)(
+        values, spectral_axis, out=out)
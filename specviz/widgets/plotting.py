@@ -1,4 +1,6 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import astropy.units as u
 import numpy as np
@@ -13,9 +15,10 @@ from qtpy.QtWidgets import (QAction, QColorDialog, QMainWindow, QMdiSubWindow,
 from qtpy.uic import loadUi
 
 from .custom import LinearRegionItem
-from ..core.items import PlotDataItem
+from ..core.items import PlotDataItem, are_units_compatible
 from ..core.models import PlotProxyModel
 from ..utils import UI_PATH
+from ..utils.qt_utils import SignalThrottle
 
 from .unit_change_dialog import UnitChangeDialog
 
@@ -52,7 +55,14 @@ class PlotWindow(QMdiSubWindow):
         self._central_widget.change_color_action.triggered.connect(
             self._on_change_color)
 
-        self._central_widget.reset_view_action.triggered.connect(lambda: self.plot_widget.autoRange())
+        self._central_widget.reset_view_action.triggered.connect(lambda: self.plot_widget.auto_range())
+
+    def closeEvent(self, event):
+        # Converted arrays shared with other plot windows are released, so
+        # that they are dropped once no window uses them
+        self.proxy_model.release()
+
+        super(PlotWindow, self).closeEvent(event)
 
     @property
     def tool_bar(self):
@@ -127,6 +137,8 @@ class PlotWidget(pg.PlotWidget):
         Fired when a plot data item has been removed from the plot widget.
     roi_moved : Signal
         Fired when region is moved. Delivers the range of region as tuple.
+        While a region is dragged, this fires at most once every
+        :attr:`roi_move_interval` milliseconds, with the latest range.
     roi_removed : Signal
         Fired when region is removed. Delivers the region removed.
     """
@@ -149,6 +161,11 @@ class PlotWidget(pg.PlotWidget):
         # Store current select region
         self._selected_region = None
 
+        # Region moves are coalesced so that listeners recompute at most once
+        # per display frame while a region is dragged
+        self._roi_move_throttle = SignalThrottle(parent=self)
+        self._roi_move_throttle.triggered.connect(self.roi_moved.emit)
+
         # Setup select region labels
         self._region_text_item = pg.TextItem(color="k")
         self.addItem(self._region_text_item, ignoreBounds=True)
@@ -164,6 +181,16 @@ class PlotWidget(pg.PlotWidget):
         # Cache a reference to the model object that's attached to the parent
         self._proxy_model = PlotProxyModel(model)
 
+        # While a batch update is in progress, compatibility checks are
+        # deferred and performed once when the batch completes
+        self._batch_depth = 0
+        self._compatibility_pending = False
+
+        # Union of the cached data bounds of the plotted items, extended as
+        # items are added and recomputed when it is next needed after an
+        # item is removed or redrawn with different data or units
+        self._data_bounds = None
+
         # Set default axes ranges
         self.setRange(xRange=(0, 1), yRange=(0, 1))
 
@@ -173,10 +200,16 @@ class PlotWidget(pg.PlotWidget):
         # Listen for model events to add/remove items from the plot
         self.proxy_model.rowsInserted.connect(self._check_unit_compatibility)
         self.proxy_model.rowsAboutToBeRemoved.connect(
-            lambda idx: self.remove_plot(index=idx))
+            self._on_rows_about_to_be_removed)
 
         self.plot_added.connect(self.check_plot_compatibility)
         self.plot_removed.connect(self.check_plot_compatibility)
+        self.proxy_model.sourceModel().data_loaded.connect(
+            self._on_data_loaded)
+
+        # Plotted items choose their level of detail from the displayed range
+        self.getViewBox().sigXRangeChanged.connect(self._update_item_views)
+        self.getViewBox().sigResized.connect(self._update_item_views)
 
     @property
     def title(self):
@@ -196,39 +229,79 @@ class PlotWidget(pg.PlotWidget):
 
     @data_unit.setter
     def data_unit(self, value):
-        for plot_data_item in self.listDataItems():
-            if plot_data_item.is_data_unit_compatible(value):
-                plot_data_item.data_unit = value
-
-                # Re-initialize plot to update the displayed values and
-                # adjust ranges of the displayed axes
-                self.initialize_plot(spectral_axis_unit=value)
-            else:
-                # Technically, this should not occur, but in the unforseen
-                # case that it does, remove the plot and log an error
-                self.remove_plot(item=plot_data_item)
-                logging.error("Removing plot '%s' due to incompatible units "
-                              "('%s' and '%s').",
-                              plot_data_item.data_item.name,
-                              plot_data_item.spectral_axis_unit, value)
+        self.set_units(data_unit=value)
 
     @spectral_axis_unit.setter
     def spectral_axis_unit(self, value):
-        for plot_data_item in self.listDataItems():
-            if plot_data_item.is_spectral_axis_unit_compatible(value):
-                plot_data_item.spectral_axis_unit = value
-
-                # Re-initialize plot to update the displayed values and
-                # adjust ranges of the displayed axes
-                self.initialize_plot(spectral_axis_unit=value)
-            else:
-                # Technically, this should not occur, but in the unforseen
-                # case that it does, remove the plot and log an error
-                self.remove_plot(item=plot_data_item)
-                logging.error("Removing plot '%s' due to incompatible units "
-                              "('%s' and '%s').",
-                              plot_data_item.data_item.name,
-                              plot_data_item.spectral_axis_unit, value)
+        self.set_units(spectral_axis_unit=value)
+
+    def set_units(self, data_unit=None, spectral_axis_unit=None):
+        """
+        Change the display units of the plot in a single transaction. The data
+        of every plotted item is converted on a pool of worker threads, since
+        NumPy releases the interpreter lock while converting, after which
+        each item is redrawn once and the axes are relabeled and re-ranged
+        once.
+
+        Parameters
+        ----------
+        data_unit : str or :class:`~astropy.units.Unit`, optional
+            The new unit of the y axis. Defaults to the current unit.
+        spectral_axis_unit : str or :class:`~astropy.units.Unit`, optional
+            The new unit of the x axis. Defaults to the current unit.
+        """
+        data_unit = self.data_unit if data_unit is None else data_unit
+        spectral_axis_unit = spectral_axis_unit or self.spectral_axis_unit
+        compatible_items = []
+
+        with self.batch_update():
+            for plot_data_item in self.listDataItems():
+                if plot_data_item.are_units_compatible(spectral_axis_unit,
+                                                       data_unit):
+                    compatible_items.append(plot_data_item)
+                else:
+                    # Technically, this should not occur, but in the
+                    # unforseen case that it does, remove the plot and log
+                    # an error
+                    self.remove_plot(item=plot_data_item)
+                    logging.error("Removing plot '%s' due to incompatible "
+                                  "units ('%s' and '%s').",
+                                  plot_data_item.data_item.name,
+                                  plot_data_item.spectral_axis_unit,
+                                  spectral_axis_unit)
+
+            if len(compatible_items) == 0:
+                return
+
+            if len(compatible_items) > 1:
+                with ThreadPoolExecutor(
+                        max_workers=min(len(compatible_items),
+                                        os.cpu_count() or 1)) as executor:
+                    # Retrieve each result so that errors are raised here
+                    list(executor.map(
+                        lambda x: x.prepare_units(data_unit,
+                                                  spectral_axis_unit),
+                        compatible_items))
+
+            for plot_data_item in compatible_items:
+                plot_data_item.set_units(data_unit, spectral_axis_unit)
+
+            # Re-initialize plot to update the displayed values and adjust
+            # ranges of the displayed axes
+            self.initialize_plot(data_unit=data_unit,
+                                 spectral_axis_unit=spectral_axis_unit)
+
+    @property
+    def roi_move_interval(self):
+        """
+        Minimum time, in milliseconds, between `roi_moved` signals while a
+        region is dragged.
+        """
+        return self._roi_move_throttle.interval
+
+    @roi_move_interval.setter
+    def roi_move_interval(self, value):
+        self._roi_move_throttle.interval = value
 
     @property
     def selected_region(self):
@@ -245,6 +318,22 @@ class PlotWidget(pg.PlotWidget):
             return self.selected_region.getRegion() * u.Unit(
                 self.spectral_axis_unit or "")
 
+    @property
+    def regions(self):
+        """Returns every region on the plot, in the order they were added."""
+        return [item for item in self.getPlotItem().items
+                if isinstance(item, LinearRegionItem)]
+
+    @property
+    def regions_bounds(self):
+        """
+        Returns the bounds of every region on the plot as tuples of
+        quantities.
+        """
+        unit = u.Unit(self.spectral_axis_unit or "")
+
+        return [region.getRegion() * unit for region in self.regions]
+
     @property
     def region_mask(self):
         mask = np.ones(layer.masked_dispersion.shape, dtype=bool)
@@ -270,10 +359,20 @@ class PlotWidget(pg.PlotWidget):
         """
         Called when the user clicks the item's checkbox.
         """
+        # Items enabled or disabled for their units were not clicked
+        if self.proxy_model.sourceModel().is_updating_flags:
+            return
+
         source_index = self.proxy_model.sourceModel().indexFromItem(item)
         proxy_index = self.proxy_model.mapFromSource(source_index)
 
-        plot_data_item = self.proxy_model.item_from_index(proxy_index)
+        # Items without a plot data item have never been made visible, so
+        # there is nothing to add or remove
+        plot_data_item = self.proxy_model.item_from_index(proxy_index,
+                                                          create=False)
+
+        if plot_data_item is None:
+            return
 
         if plot_data_item.visible:
             if plot_data_item not in self.listDataItems():
@@ -289,33 +388,110 @@ class PlotWidget(pg.PlotWidget):
         # Re-evaluate plot unit compatibilities
         # self.check_plot_compatibility()
 
+    @contextmanager
+    def batch_update(self):
+        """
+        Context manager grouping several plot additions or removals. Unit
+        compatibility of the data items is re-evaluated once when the
+        outermost batch completes, rather than after every change.
+        """
+        self._batch_depth += 1
+
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+
+            if self._batch_depth == 0 and self._compatibility_pending:
+                self._compatibility_pending = False
+                self.check_plot_compatibility()
+
     def check_plot_compatibility(self):
-        for i in range(self.proxy_model.sourceModel().rowCount()):
-            model_item = self.proxy_model.sourceModel().item(i)
-            source_index = self.proxy_model.sourceModel().indexFromItem(model_item)
-            proxy_index = self.proxy_model.mapFromSource(source_index)
+        """
+        Enables the data items whose units are compatible with those of the
+        plot, and disables the rest.
+        """
+        if self._batch_depth > 0:
+            self._compatibility_pending = True
+            return
 
-            if not proxy_index.isValid():
-                continue
+        self._update_compatibility(range(self.proxy_model.rowCount()))
 
-            plot_data_item = self.proxy_model.item_from_index(proxy_index)
+    def _check_unit_compatibility(self, parent, first, last):
+        if parent.isValid():
+            return
+
+        self._update_compatibility(range(first, last + 1))
+
+    def _on_data_loaded(self, data_item):
+        # Rows whose units were unknown until loaded are checked once loaded
+        source_index = self.proxy_model.sourceModel().indexFromItem(data_item)
+        proxy_index = self.proxy_model.mapFromSource(source_index)
+
+        if proxy_index.isValid():
+            self._update_compatibility([proxy_index.row()])
+
+    def _update_compatibility(self, rows):
+        """
+        Evaluates the unit compatibility of a range of proxy model rows in a
+        single pass. Unit equivalencies are checked once per distinct pair of
+        data item units, rather than once per row.
+        """
+        source_model = self.proxy_model.sourceModel()
+        plot_is_empty = self.data_unit is None and \
+            self.spectral_axis_unit is None
+        compatible_units = {}
+
+        # Enabling or disabling an item emits `itemChanged`, which listeners
+        # would otherwise treat as a click of the item's checkbox
+        with source_model.updating_flags():
+            for row in rows:
+                source_index = self.proxy_model.mapToSource(
+                    self.proxy_model.index(row, 0))
+
+                if not source_index.isValid():
+                    continue
+
+                data_item = source_model.itemFromIndex(source_index)
 
-            if self.data_unit is None and self.spectral_axis_unit is None or \
-                    plot_data_item.are_units_compatible(
-                        self.spectral_axis_unit, self.data_unit):
-                plot_data_item.data_item.setEnabled(True)
-            else:
-                plot_data_item.data_item.setEnabled(False)
+                # Catalog files are not parsed just to check their units;
+                # they are checked again once loaded
+                if not data_item.units_known:
+                    continue
 
-    def _check_unit_compatibility(self, index, first=None, last=None):
-        if not index.isValid():
+                units = (data_item.flux_unit, data_item.spectral_axis_unit)
+
+                if units not in compatible_units:
+                    compatible_units[units] = plot_is_empty or \
+                        are_units_compatible(*units, self.spectral_axis_unit,
+                                             self.data_unit)
+
+                if data_item.isEnabled() != compatible_units[units]:
+                    data_item.setEnabled(compatible_units[units])
+
+    def _on_rows_about_to_be_removed(self, parent, first, last):
+        if parent.isValid():
             return
 
-        plot_data_item = self.proxy_model.item_from_index(index)
+        plotted_items = set(self.listDataItems())
+
+        with self.batch_update():
+            for row in range(first, last + 1):
+                # Rows that were never plotted have no plot data item, and
+                # there is no need to create one just to remove it
+                item = self.proxy_model.item_from_index(
+                    self.proxy_model.index(row, 0), create=False)
+
+                if item is not None and item in plotted_items:
+                    self.remove_plot(item=item)
+
+    def _update_item_views(self, *args):
+        view_box = self.getViewBox()
+        x_range = view_box.viewRange()[0]
 
-        if not plot_data_item.are_units_compatible(self.spectral_axis_unit,
-                                                   self.data_unit):
-            plot_data_item.setEnabled(False)
+        for item in self.listDataItems():
+            if isinstance(item, PlotDataItem):
+                item.set_view(x_range, view_box.width())
 
     def add_plot(self, item=None, index=None, visible=True, initialize=False):
         """
@@ -341,13 +517,21 @@ class PlotWidget(pg.PlotWidget):
 
         if item.are_units_compatible(self.spectral_axis_unit,
                                                self.data_unit):
-            item.data_unit = self.data_unit
-            item.spectral_axis_unit = self.spectral_axis_unit
+            item.set_units(self.data_unit, self.spectral_axis_unit)
         else:
             item.reset_units()
 
         self.addItem(item)
 
+        # Bounds that have been invalidated are rebuilt from every item the
+        # next time they are needed, so only extend bounds that are complete
+        if self._data_bounds is not None:
+            self._extend_data_bounds(item)
+
+        item.sigPlotChanged.connect(self._invalidate_data_bounds)
+        item.set_view(self.getViewBox().viewRange()[0],
+                      self.getViewBox().width())
+
         if initialize:
             self.initialize_plot(item.data_unit,
                                  item.spectral_axis_unit)
@@ -393,7 +577,64 @@ class PlotWidget(pg.PlotWidget):
         else:
             self._plot_item.setLabel('left', "Flux", units=data_unit)
 
-        self.autoRange()
+        self.auto_range()
+
+    @property
+    def data_bounds(self):
+        """
+        The range spanned by the finite data of all plotted items, as
+        ``[x_min, x_max], [y_min, y_max]``, or `None` if nothing is plotted.
+        This is assembled from the bounds each item caches for its current
+        units, so the data itself is not rescanned.
+        """
+        if self._data_bounds is None:
+            for item in self.listDataItems():
+                self._extend_data_bounds(item)
+
+        return self._data_bounds
+
+    def _extend_data_bounds(self, item):
+        if not isinstance(item, PlotDataItem):
+            return
+
+        if self._data_bounds is None:
+            self._data_bounds = [[None, None], [None, None]]
+
+        for bounds, (item_min, item_max) in zip(self._data_bounds,
+                                                item.data_bounds):
+            if item_min is None:
+                continue
+
+            bounds[0] = item_min if bounds[0] is None \
+                else min(bounds[0], item_min)
+            bounds[1] = item_max if bounds[1] is None \
+                else max(bounds[1], item_max)
+
+    def _invalidate_data_bounds(self, *args):
+        self._data_bounds = None
+
+    def auto_range(self):
+        """
+        Set the displayed range of the axes to fit the plotted data. Unlike
+        :meth:`autoRange`, which asks every item to scan its data, this uses
+        the cached :attr:`data_bounds`.
+        """
+        data_bounds = self.data_bounds
+
+        if data_bounds is None:
+            return
+
+        (x_min, x_max), (y_min, y_max) = data_bounds
+        ranges = {}
+
+        if x_min is not None:
+            ranges['xRange'] = (x_min, x_max)
+
+        if y_min is not None:
+            ranges['yRange'] = (y_min, y_max)
+
+        if len(ranges) > 0:
+            self.setRange(**ranges)
 
     def remove_plot(self, item=None, index=None, start=None, end=None):
         """
@@ -425,6 +666,12 @@ class PlotWidget(pg.PlotWidget):
 
             # Remove plot data item from this plot
             self.removeItem(item)
+            self._invalidate_data_bounds()
+
+            try:
+                item.sigPlotChanged.disconnect(self._invalidate_data_bounds)
+            except TypeError:
+                pass
 
             # If there are no current plots, reset unit information for plot
             if len(self.listDataItems()) == 0:
@@ -449,7 +696,7 @@ class PlotWidget(pg.PlotWidget):
         """
         self._region_text_item.setText(
             "Region: ({:0.5g}, {:0.5g})".format(*self.selected_region_bounds))
-        self.roi_moved.emit(self.selected_region_bounds)
+        self._roi_move_throttle.push(self.selected_region_bounds)
 
     def _on_add_linear_region(self, min_bound=None, max_bound=None):
         """
@@ -506,6 +753,10 @@ class PlotWidget(pg.PlotWidget):
     def _on_remove_linear_region(self):
         """Remove the selected linear region from the plot."""
         roi = self._selected_region
+
+        # Moves of the removed region are no longer of interest
+        self._roi_move_throttle.cancel()
+
         self.removeItem(self._selected_region)
         self._selected_region = None
         self._region_text_item.setText("")
@@ -228,9 +228,6 @@ class UnitChangeDialog(QDialog):
                     self.close()
                     return False
 
-            # Set new units
-            self.plot_widget.data_unit = data_unit_formatted
-
         else:
             # Converts the data_unit to something that can be used by PlotWidget
             self.current_data_unit = self.ui.comboBox_units.currentText()
@@ -244,9 +241,6 @@ class UnitChangeDialog(QDialog):
                     self.close()
                     return False
 
-            # Set new units
-            self.plot_widget.data_unit = data_unit_formatted
-
         if self.ui.comboBox_spectral.currentText() == "Custom":
 
             # Try to enter the custom units
@@ -274,9 +268,6 @@ class UnitChangeDialog(QDialog):
                     self.close()
                     return False
 
-            # Set new units
-            self.plot_widget.spectral_axis_unit = spectral_axis_unit_formatted
-
         else:
             # Converts the spectral_axis_unit to something that can be used by PlotWidget
             self.current_spectral_axis_unit = self.ui.comboBox_spectral.currentText()
@@ -290,8 +281,10 @@ class UnitChangeDialog(QDialog):
                     self.close()
                     return False
 
-            # Set new units
-            self.plot_widget.spectral_axis_unit = spectral_axis_unit_formatted
+        # Set new units, converting the plotted data once for both axes
+        self.plot_widget.set_units(
+            data_unit=data_unit_formatted,
+            spectral_axis_unit=spectral_axis_unit_formatted)
 
         self.close()
         return True
@@ -5,16 +5,18 @@ from collections import OrderedDict
 
 from astropy.io import registry as io_registry
 from qtpy import compat
-from qtpy.QtCore import QEvent, Qt, Signal
-from qtpy.QtWidgets import (QActionGroup, QApplication, QMainWindow, QMenu,
-                            QMessageBox, QSizePolicy, QTabBar, QToolButton,
-                            QWidget)
+from qtpy.QtCore import QEvent, Qt, QTimer, Signal
+from qtpy.QtWidgets import (QActionGroup, QApplication, QInputDialog,
+                            QMainWindow, QMenu, QMessageBox, QProgressBar,
+                            QSizePolicy, QTabBar, QToolButton, QWidget)
 from qtpy.uic import loadUi
 from specutils import Spectrum1D
 
 from ..core.items import PlotDataItem
+from ..core.loaders import AUTO_LOADER, expand_paths, read_spectrum
 from ..core.models import DataListModel
 from ..core.plugin import Plugin
+from ..core.threads import FileLoadManager
 from ..utils import UI_PATH
 from ..utils.qt_utils import dict_to_menu
 from .plotting import PlotWindow
@@ -59,6 +61,10 @@ class Workspace(QMainWindow):
         # Setup data action connections
         self.load_data_action.triggered.connect(
             self._on_load_data)
+        self.load_directory_action.triggered.connect(
+            self._on_load_directory)
+        self.load_catalog_action.triggered.connect(
+            self._on_load_catalog)
         self.delete_data_action.triggered.connect(
             self._on_delete_data)
 
@@ -72,6 +78,10 @@ class Workspace(QMainWindow):
         # Define a new data list model for this workspace
         self._model = DataListModel()
 
+        # Rows all share the same height, which lets the view lay out large
+        # catalogs without measuring every row
+        self.list_view.setUniformItemSizes(True)
+
         # Set the styled item delegate on the model
         # self.list_view.setItemDelegate(DataItemDelegate(self))
 
@@ -87,10 +97,46 @@ class Workspace(QMainWindow):
         self.dark_theme_action.triggered.connect(
             lambda: self._on_change_color_theme('dark'))
 
+        # Precision of the arrays plots are drawn from
+        self.single_precision_toggle.toggled.connect(
+            self._on_toggle_single_precision)
+
         # Connect to signals given off by the list view
         self._model.itemChanged.connect(
             self._on_item_changed)
 
+        # Parse data files on background threads so the ui stays responsive
+        self._load_manager = FileLoadManager(parent=self)
+        self._load_errors = []
+
+        if self._app is not None:
+            self._app.aboutToQuit.connect(self._load_manager.shutdown)
+
+        # Parsed spectra are buffered and periodically added to the model in
+        # bulk, rather than inserting rows one at a time
+        self._loaded_buffer = []
+        self._load_flush_timer = QTimer(self)
+        self._load_flush_timer.setSingleShot(True)
+        self._load_flush_timer.setInterval(250)
+        self._load_flush_timer.timeout.connect(self._flush_loaded_data)
+
+        self._load_manager.file_loaded.connect(self._on_file_loaded)
+        self._load_manager.file_failed.connect(self._on_file_failed)
+        self._load_manager.progress.connect(self._on_load_progress)
+        self._load_manager.finished.connect(self._on_load_finished)
+
+        # Display load progress and allow cancelling from the status bar
+        self._load_progress_bar = QProgressBar()
+        self._load_progress_bar.setMaximumWidth(200)
+        self._load_cancel_button = QToolButton()
+        self._load_cancel_button.setText("Cancel")
+        self._load_cancel_button.clicked.connect(self.cancel_load_data)
+
+        self.statusBar().addPermanentWidget(self._load_progress_bar)
+        self.statusBar().addPermanentWidget(self._load_cancel_button)
+        self._load_progress_bar.hide()
+        self._load_cancel_button.hide()
+
     @property
     def name(self):
         """The name of this workspace."""
@@ -156,6 +202,10 @@ class Workspace(QMainWindow):
             return item
 
     def _on_item_changed(self, item):
+        # Items enabled or disabled for their units were not clicked
+        if self.model.is_updating_flags:
+            return
+
         # If the item checkbox is clicked, ensure that the item is also selected
         if item.isEnabled():
             source_index = self.list_view.model().sourceModel().indexFromItem(item)
@@ -185,6 +235,9 @@ class Workspace(QMainWindow):
         for plugin in plugin_bar.registry + tool_bar.registry:
             plugin()
 
+    def _on_toggle_single_precision(self, checked):
+        self.model.display_precision = 'single' if checked else 'double'
+
     def _on_change_color_theme(self, theme):
         import pyqtgraph as pg
 
@@ -307,18 +360,66 @@ class Workspace(QMainWindow):
         :class:`~specutils.Spectrum1D` object and thereafter adds it to the
         data model.
         """
-        filters = [x + " (*)" for x in io_registry.get_formats(Spectrum1D)['Format']]
+        filters = [x + " (*)" for x in [AUTO_LOADER] + list(
+            io_registry.get_formats(Spectrum1D)['Format'])]
+
+        file_paths, fmt = compat.getopenfilenames(parent=self,
+                                                  caption="Load spectral data files",
+                                                  filters=";;".join(filters))
+
+        if not file_paths:
+            return
+
+        self.load_data_async(file_paths, file_loader=fmt.split()[0])
+
+    def _get_directory_and_format(self, caption):
+        """
+        Provides a directory dialog and a format selection.
+
+        Returns
+        -------
+        tuple
+            The chosen directory and format, or `None` if either dialog was
+            cancelled.
+        """
+        dir_path = compat.getexistingdirectory(parent=self, caption=caption)
+
+        if not dir_path:
+            return
 
-        file_path, fmt = compat.getopenfilename(parent=self,
-                                                caption="Load spectral data file",
-                                                filters=";;".join(filters))
+        fmt, accepted = QInputDialog.getItem(
+            self, caption, "Data format:",
+            [AUTO_LOADER] + list(io_registry.get_formats(Spectrum1D)['Format']),
+            editable=False)
 
-        if not file_path:
+        if not accepted:
             return
 
-        self.load_data(file_path, file_loader=fmt.split()[0])
+        return dir_path, fmt
+
+    def _on_load_directory(self):
+        """
+        Provides a directory dialog and a format selection, and loads every
+        file in the chosen directory into the data model.
+        """
+        selection = self._get_directory_and_format(
+            "Load spectral data directory")
+
+        if selection is not None:
+            self.load_data_async([selection[0]], file_loader=selection[1])
+
+    def _on_load_catalog(self):
+        """
+        Provides a directory dialog and a format selection, and lists every
+        file in the chosen directory in the data model without reading them.
+        """
+        selection = self._get_directory_and_format(
+            "Browse spectral data catalog")
+
+        if selection is not None:
+            self.load_catalog([selection[0]], file_loader=selection[1])
 
-    def load_data(self, file_path, file_loader, display=False):
+    def load_data(self, file_path, file_loader=None, display=False):
         """
         Load spectral data given file path and loader.
 
@@ -326,8 +427,9 @@ class Workspace(QMainWindow):
         ----------
         file_path : str
             Path to location of the spectrum file.
-        file_loader : str
-            Format specified for the astropy io interface.
+        file_loader : str, optional
+            Format specified for the astropy io interface. If `None` or
+            ``'auto'``, the format is detected automatically.
         display : bool
             Automatically add the loaded spectral data to the plot.
 
@@ -337,9 +439,9 @@ class Workspace(QMainWindow):
             The `DataItem` instance that has been added to the internal model.
         """
         try:
-            spec = Spectrum1D.read(file_path, format=file_loader)
-            name = file_path.split('/')[-1].split('.')[0]
-            data_item = self.model.add_data(spec, name=name)
+            spec = read_spectrum(file_path, file_loader)
+            data_item = self.model.add_data(
+                spec, name=self._name_from_path(file_path))
 
             return data_item
         except:
@@ -353,6 +455,115 @@ class Workspace(QMainWindow):
 
             message_box.exec()
 
+    def load_data_async(self, file_paths, file_loader=None):
+        """
+        Load spectral data files in the background. Files are parsed in
+        parallel, and the resulting :class:`~specviz.core.items.DataItem`
+        objects are added to the internal model in batches as parsing
+        finishes. Progress is displayed in the status bar, where the load may
+        also be cancelled.
+
+        Parameters
+        ----------
+        file_paths : str or list
+            Paths, glob patterns, or directories of spectrum files.
+        file_loader : str, optional
+            Format specified for the astropy io interface. If `None` or
+            ``'auto'``, the format of each file is detected automatically.
+        """
+        file_paths = expand_paths(file_paths)
+
+        if len(file_paths) == 0:
+            return
+
+        self._load_progress_bar.show()
+        self._load_cancel_button.show()
+
+        self._load_manager.load(file_paths, file_loader)
+
+    def load_catalog(self, file_paths, file_loader=None):
+        """
+        List a catalog of spectral data files without reading them. Data items
+        are only created as the data list is scrolled, and each file is only
+        parsed once its spectrum is used, so very large catalogs open
+        immediately.
+
+        Parameters
+        ----------
+        file_paths : str or list
+            Paths, glob patterns, or directories of spectrum files.
+        file_loader : str, optional
+            Format specified for the astropy io interface. If `None` or
+            ``'auto'``, the format of each file is detected automatically.
+
+        Returns
+        -------
+        int
+            The number of files in the catalog.
+        """
+        count = self.model.add_catalog(expand_paths(file_paths), file_loader)
+
+        # Views only ask for more rows as they scroll, so populate the first
+        # batch for views that are already showing every row
+        if self.model.canFetchMore():
+            self.model.fetchMore()
+
+        self.statusBar().showMessage(
+            "Listed {} files from catalog.".format(count), 5000)
+
+        return count
+
+    def cancel_load_data(self):
+        """
+        Cancel any background loads. Files that finish parsing after this call
+        are not added to the model.
+        """
+        self._load_manager.cancel()
+        self._loaded_buffer = []
+        self.statusBar().showMessage("Cancelled loading data.", 5000)
+
+    @staticmethod
+    def _name_from_path(file_path):
+        return os.path.basename(file_path).split('.')[0]
+
+    def _on_file_loaded(self, file_path, spec):
+        self._loaded_buffer.append((spec, self._name_from_path(file_path)))
+
+        if not self._load_flush_timer.isActive():
+            self._load_flush_timer.start()
+
+    def _flush_loaded_data(self):
+        self._load_flush_timer.stop()
+
+        if len(self._loaded_buffer) > 0:
+            specs, names = zip(*self._loaded_buffer)
+            self._loaded_buffer = []
+            self.model.add_data_many(specs, names)
+
+    def _on_file_failed(self, file_path, exception):
+        self._load_errors.append("{}: {}".format(file_path, exception))
+
+    def _on_load_progress(self, completed, total):
+        self._load_progress_bar.setMaximum(total)
+        self._load_progress_bar.setValue(completed)
+        self._load_progress_bar.setFormat("Loading %v/%m files")
+
+    def _on_load_finished(self):
+        self._flush_loaded_data()
+
+        self._load_progress_bar.hide()
+        self._load_cancel_button.hide()
+
+        if len(self._load_errors) > 0:
+            message_box = QMessageBox()
+            message_box.setText("Error loading data set.")
+            message_box.setIcon(QMessageBox.Critical)
+            message_box.setInformativeText("\n".join(self._load_errors))
+
+            message_box.exec()
+
+        self._load_errors = []
+
     def _on_delete_data(self):
         """
         Listens for data deletion events from the